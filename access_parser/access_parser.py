@@ -1,14 +1,35 @@
+import hashlib
+import io
+import csv
+import itertools
 import logging
+import operator
+import os
 import struct
-from collections import defaultdict
+import tempfile
+import threading
+from array import array
+from collections import defaultdict, deque, OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from decimal import Decimal
 
 from construct import ConstructError
 from tabulate import tabulate
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 from .parsing_primitives import parse_relative_object_metadata_struct, parse_table_head, parse_data_page_header, \
-    ACCESSHEADER, MEMO, parse_table_data, TDEF_HEADER, LVPROP
-from .utils import categorize_pages, parse_type, TYPE_MEMO, TYPE_TEXT, TYPE_BOOLEAN, read_db_file, numeric_to_string, \
-    TYPE_96_bit_17_BYTES, TYPE_OLE
+    ACCESSHEADER, MEMO, parse_table_data, TDEF_HEADER, LVPROP, parse_data_page_header_fast, \
+    parse_relative_object_metadata_fast, ENGINE_FAST, ENGINE_CONSTRUCT, parse_memo_header_fast, MEMO_HEADER, \
+    MEMO_INLINE, MEMO_LVAL1
+from .utils import parse_type, TYPE_MEMO, TYPE_TEXT, TYPE_BOOLEAN, read_db_file, numeric_to_string, \
+    TYPE_96_bit_17_BYTES, TYPE_OLE, PageStore, decode_usage_map, PAGE_TYPE_DATA, PAGE_TYPE_TABLE_DEF, TYPE_INT8, \
+    TYPE_INT16, TYPE_INT32, TYPE_COMPLEX, TYPE_FLOAT32, TYPE_FLOAT64, TYPE_MONEY, TYPE_DATETIME, format_money, \
+    mdb_date_to_readable, ACCESS_EPOCH
 
 # Page sizes
 PAGE_SIZE_V3 = 0x800
@@ -25,6 +46,96 @@ NEW_VERSIONS = [VERSION_4, VERSION_5, VERSION_2010]
 
 SYSTEM_TABLE_FLAGS = [-0x80000000, -0x00000002, 0x80000000, 0x00000002]
 
+# Catalog (MSysObjects) columns needed to list the tables
+CATALOG_COLUMNS = ["Name", "Id", "Type", "Flags"]
+
+# struct formats of fixed length types that can be unpacked in place
+FIXED_TYPE_STRUCTS = {
+    TYPE_INT8: struct.Struct("<b"),
+    TYPE_INT16: struct.Struct("<h"),
+    TYPE_INT32: struct.Struct("<i"),
+    TYPE_COMPLEX: struct.Struct("<i"),
+    TYPE_MONEY: struct.Struct("<q"),
+    TYPE_FLOAT32: struct.Struct("<f"),
+    TYPE_FLOAT64: struct.Struct("<d"),
+    TYPE_DATETIME: struct.Struct("<q"),
+}
+
+# struct formats of the fixed length types that iter_rows can filter on. DATETIME is compared as days since ACCESS_EPOCH
+FILTER_TYPE_STRUCTS = {**FIXED_TYPE_STRUCTS, TYPE_DATETIME: struct.Struct("<d")}
+# Formats of date strings in iter_rows filters
+FILTER_DATETIME_FORMATS = ("%Y-%m-%d %H:%M:%S.%f", "%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S.%f", "%Y-%m-%dT%H:%M:%S",
+                           "%Y-%m-%d %H:%M", "%Y-%m-%dT%H:%M", "%Y-%m-%d")
+# Comparison operators of iter_rows filters. "in", "is null" and "is not null" are handled by RecordFilter
+FILTER_OPERATORS = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+
+# numpy dtypes of fixed length types that parse_columnar decodes into arrays. MONEY is kept as the raw integer (the value
+# * 10000) and DATETIME is converted from days since ACCESS_EPOCH to datetime64
+COLUMNAR_DTYPES = {
+    TYPE_BOOLEAN: "?",
+    TYPE_INT8: "<i1",
+    TYPE_INT16: "<i2",
+    TYPE_INT32: "<i4",
+    TYPE_MONEY: "<i8",
+    TYPE_FLOAT32: "<f4",
+    TYPE_FLOAT64: "<f8",
+    TYPE_DATETIME: "<f8",
+}
+# Valid dates are 0 <= days from ACCESS_EPOCH < MAX_DATETIME_DAYS, up to the end of 9999-12-31. This is the range
+# mdb_date_to_readable converts, it returns "(Invalid Date)" for negative values (the sign bit is set)
+MAX_DATETIME_DAYS = 2958466
+# Rows of consecutive data pages are decoded together by parse_columnar to amortize the numpy calls
+COLUMNAR_BATCH_ROWS = 8192
+# How MEMO and OLE values are returned. BLOBS_VALUE decodes them when the row is parsed, BLOBS_HANDLE returns a BlobHandle
+# that reads the value when it is used. BLOBS_SIZE returns the byte length of the value and BLOBS_SIZE_STORAGE a
+# (byte length, storage) tuple, storage is MEMO_INLINE, MEMO_LVAL1 or MEMO_LVAL2. Both are read from the MEMO header in
+# the row, without following the record pointer
+BLOBS_VALUE = "value"
+BLOBS_HANDLE = "handle"
+BLOBS_SIZE = "size"
+BLOBS_SIZE_STORAGE = "size_storage"
+BLOBS_MODES = (BLOBS_VALUE, BLOBS_HANDLE, BLOBS_SIZE, BLOBS_SIZE_STORAGE)
+
+
+def _blobs_mode(blobs, hash_blobs):
+    """
+    The blobs mode of the row decoders. Hashing is requested with hash_blobs, the decoders get the tuple of the hash
+    algorithms as their mode
+    """
+    if hash_blobs:
+        if isinstance(hash_blobs, str):
+            hash_blobs = (hash_blobs,)
+        return tuple(hash_blobs)
+    return blobs
+
+
+def _check_rows_range(limit, offset):
+    """
+    Validate the limit and offset of a parse, so a bad value fails before any page is read
+    """
+    if limit is not None and limit < 0:
+        raise ValueError(f"Invalid limit {limit}, must be None or a non negative number of rows")
+    if offset < 0:
+        raise ValueError(f"Invalid offset {offset}, must be a non negative number of rows")
+
+
+# Maximal number of data pages whose record offsets are kept by RecordOffsetIndex
+RECORD_INDEX_MAX_PAGES = 4096
+# Columns of the manifest written by AccessParser.extract_blobs
+BLOB_MANIFEST_COLUMNS = ["table", "row", "column", "hash", "size"]
+# Number of blobs waiting for the extraction threads, per thread
+BLOBS_PENDING_PER_WORKER = 4
+# Number of page ranges per worker when a table is decoded in parallel. Rows with MEMO/OLE data can make some ranges a
+# lot slower than others, smaller ranges keep all the workers busy
+PAGE_RANGES_PER_WORKER = 4
+
 LOG_LEVEL = logging.WARNING
 logging.basicConfig(format='%(levelname)s:%(message)s', level=LOG_LEVEL)
 
@@ -33,17 +144,759 @@ class TableObj(object):
     def __init__(self, offset, val):
         self.value = val
         self.offset = offset
-        self.linked_pages = []
+        # Page numbers of the table data pages, None until the table is linked to its data pages
+        self.linked_pages = None
+
+
+class RecordOffsetIndex(object):
+    """
+    Index of the record offsets of data pages, shared by all the tables of a parser. The data page header of a page is
+    parsed the first time one of its records is needed and its record offsets are kept in a compact array, so overflow
+    rows and LVAL chunks that point to the same page do not parse its header again.
+    The index is a bounded LRU cache of the most recently used pages, it can be used from multiple threads.
+    """
+    def __init__(self, pages, version, engine=ENGINE_FAST, max_pages=RECORD_INDEX_MAX_PAGES):
+        """
+        :param pages: PageStore of the database
+        :param version: database version
+        :param engine: engine used to parse the data page headers, ENGINE_FAST or ENGINE_CONSTRUCT
+        :param max_pages: maximal number of pages to keep
+        """
+        if engine == ENGINE_FAST:
+            self._parse_data_page_header = parse_data_page_header_fast
+        elif engine == ENGINE_CONSTRUCT:
+            self._parse_data_page_header = parse_data_page_header
+        else:
+            raise ValueError(f"Unknown parsing engine {engine}")
+        self._pages = pages
+        self.version = version
+        self.max_pages = max_pages
+        self._offsets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def get(self, page_num):
+        """
+        Get the record offsets of a data page
+        :param page_num: page number of a data page
+        :return: array of the record offsets, with their flags
+        """
+        with self._lock:
+            offsets = self._offsets.get(page_num)
+            if offsets is not None:
+                self._offsets.move_to_end(page_num)
+                return offsets
+        parsed_data = self._parse_data_page_header(self._pages.get_page(page_num), version=self.version)
+        offsets = array("H", parsed_data.record_offsets)
+        with self._lock:
+            self._offsets[page_num] = offsets
+            if len(self._offsets) > self.max_pages:
+                self._offsets.popitem(last=False)
+        return offsets
+
+
+class BlobHandle(object):
+    """
+    Handle of a MEMO or OLE value that was not read yet. It keeps only the MEMO header of the value, the value itself
+    is read (following the LVAL pages if it is not inline) every time read() or str() is called.
+    Handles read from the database file, so they can not be read after the parser is closed.
+    """
+    __slots__ = ("_table", "column_type", "length", "storage", "record_pointer", "_data")
+
+    def __init__(self, access_table, column_type, data):
+        """
+        :param access_table: AccessTable the value belongs to
+        :param column_type: TYPE_MEMO or TYPE_OLE
+        :param data: the MEMO header of the value in the row (with the inline data for inline values)
+        """
+        self._table = access_table
+        self.column_type = column_type
+        self.length, self.storage, self.record_pointer = parse_memo_header_fast(data)
+        self._data = data
+
+    def read(self):
+        """
+        Read the value
+        :return: str for MEMO values and bytes for OLE values, like AccessTable.parse returns them
+        """
+        self._table._pages.check_open()
+        try:
+            return self._table._parse_memo(self._data, return_raw=self.column_type == TYPE_OLE)
+        except ConstructError:
+            logging.warning("Failed to parse memo field. Using data as bytes")
+            return self._data
+
+    def open(self):
+        """
+        Open the raw bytes of the value as a read only file object. The LVAL pages are read one at a time while reading
+        :return: BlobReader
+        """
+        return BlobReader(self)
+
+    def iter_chunks(self):
+        """
+        Iterate over the raw bytes of the value, without copying them
+        :return: generator of memoryviews - the inline data, the LVAL1 record or every record of the LVAL2 chain
+        """
+        # Inline data is a view of the row, it is released with the database file
+        self._table._pages.check_open()
+        if self.storage == MEMO_INLINE:
+            data = memoryview(self._data)[MEMO_HEADER.size:]
+            if len(data) < self.length:
+                logging.warning("Inline memo field has invalid length using full data")
+                yield data
+            else:
+                yield data[:self.length]
+        elif self.storage == MEMO_LVAL1:
+            record = self._table._get_overflow_record(self.record_pointer)
+            if record:
+                yield record
+        else:
+            yield from self._table._iter_lval_chunks(self.record_pointer)
+
+    def hash(self, algorithms=("sha256",)):
+        """
+        Hash the raw bytes of the value. The chunks are fed to the hashes while the LVAL chain is walked, so the value
+        is never held in memory
+        :param algorithms: hashlib algorithm names
+        :return: dict of {algorithm: hex digest}
+        """
+        hashes = [hashlib.new(algorithm) for algorithm in algorithms]
+        for chunk in self.iter_chunks():
+            for value_hash in hashes:
+                value_hash.update(chunk)
+        return {algorithm: value_hash.hexdigest() for algorithm, value_hash in zip(algorithms, hashes)}
+
+    def __str__(self):
+        return str(self.read())
+
+    def __repr__(self):
+        return f"<BlobHandle {self.storage} length={self.length}>"
+
+
+class BlobReader(io.RawIOBase):
+    """
+    Read only, non seekable file object of the raw bytes of a MEMO or OLE value. Inline values are read from the row,
+    LVAL values are read from their pages as the reader gets to them, so only the current page is referenced no matter
+    how big the value is. readinto copies straight from the page to the caller buffer.
+    MEMO values are returned as the raw stored bytes, without decoding the text.
+    """
+    def __init__(self, handle):
+        """
+        :param handle: BlobHandle of the value
+        """
+        super().__init__()
+        self._chunks = handle.iter_chunks()
+        self._chunk = memoryview(b"")
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self.closed:
+            raise ValueError("I/O operation on closed file.")
+        while not self._chunk:
+            self._chunk = next(self._chunks, None)
+            if self._chunk is None:
+                self._chunk = memoryview(b"")
+                return 0
+        size = min(len(buffer), len(self._chunk))
+        memoryview(buffer).cast("B")[:size] = self._chunk[:size]
+        self._chunk = self._chunk[size:]
+        return size
+
+    def close(self):
+        self._chunks = iter(())
+        self._chunk = memoryview(b"")
+        super().close()
+
+
+class _BlobStore(object):
+    """
+    Content addressed directory of blobs. A blob is stored at <root>/<hash[:2]>/<hash>, blobs that are already in the
+    directory (written now or by an earlier extraction) are not written again.
+    """
+    def __init__(self, root, algorithm="sha256"):
+        self.root = root
+        self.algorithm = algorithm
+        self.stored = 0
+        self._claimed = set()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _iter_chunks(value):
+        # Values that could not be parsed as a MEMO header are bytes
+        return value.iter_chunks() if isinstance(value, BlobHandle) else [value]
+
+    def store(self, value):
+        """
+        Store a blob. The blob is hashed first and written only if it is new, so identical blobs are written once. Both
+        passes read it page by page from the file mapping
+        :param value: BlobHandle or bytes
+        :return: (hex digest, size)
+        """
+        value_hash = hashlib.new(self.algorithm)
+        size = 0
+        for chunk in self._iter_chunks(value):
+            value_hash.update(chunk)
+            size += len(chunk)
+        digest = value_hash.hexdigest()
+        with self._lock:
+            if digest in self._claimed:
+                return digest, size
+            self._claimed.add(digest)
+        path = os.path.join(self.root, digest[:2], digest)
+        if os.path.exists(path):
+            return digest, size
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # A unique temporary file next to the final path, other threads or processes may extract to the same directory
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in self._iter_chunks(value):
+                    f.write(chunk)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+        with self._lock:
+            self.stored += 1
+        return digest, size
+
+
+class RowDecoder(object):
+    """
+    Row decoder compiled from the table definition. The layout of the fixed length columns (offsets, struct formats and
+    null table positions) and the order of the variable length columns are resolved once per table, so decoding a row
+    is a walk over these plans instead of rediscovering the schema for every row.
+    The null table is read in place - every column tests its own bit with a precomputed (byte index, mask) pair.
+    """
+    def __init__(self, access_table, columns=None, blobs=BLOBS_VALUE):
+        """
+        :param access_table: AccessTable the rows belong to
+        :param columns: set of column names to decode, None for all columns
+        :param blobs: how MEMO and OLE values are returned, one of BLOBS_MODES or a tuple of hashlib algorithm names to
+                      return a dict of {algorithm: hex digest} of the raw bytes of every value
+        """
+        self.hash_algorithms = None
+        if isinstance(blobs, tuple):
+            # Fail on unknown algorithms before any row is decoded
+            for algorithm in blobs:
+                hashlib.new(algorithm)
+            self.hash_algorithms = blobs
+        elif blobs not in BLOBS_MODES:
+            raise ValueError(f"Unknown blobs mode {blobs}")
+        self._table = access_table
+        self.blobs = blobs
+        self.version = access_table.version
+        # Records contain null bitmaps for columns. The number of bitmaps is the number of columns / 8 rounded up
+        self.null_table_len = (access_table.table_header.column_count + 7) // 8
+        # Fixed length data starts after the field count
+        self.fields_start = 2 if self.version > 3 else 1
+        null_bits = self.null_table_len * 8
+
+        self.fixed_columns = []
+        var_columns = {}
+        for i, column in access_table.columns.items():
+            # Variable length columns are decoded in column index order after all fixed length columns
+            if not column.column_flags.fixed_length:
+                var_columns[i] = column
+                continue
+            if columns is not None and column.col_name_str not in columns:
+                continue
+            self.fixed_columns.append(self._compile_fixed_column(column, null_bits))
+        # All variable length columns take part in the offsets bookkeeping, even the ones that are not decoded
+        self.var_columns = [self._compile_var_column(var_columns[i], null_bits, columns) for i in sorted(var_columns)]
+        self.has_var_columns = any(wanted for *_, wanted in self.var_columns)
+        # Column order of AccessTable.parse
+        self.column_names = [column[0] for column in self.fixed_columns] + \
+                            [column[0] for column in self.var_columns if column[-1]]
+
+    @staticmethod
+    def _null_bit(column, null_bits):
+        """
+        :return: (byte index in the null table, bit mask, is the column in the null table)
+        """
+        return column.column_id // 8, 1 << (column.column_id % 8), column.column_id < null_bits
+
+    def _compile_fixed_column(self, column, null_bits):
+        """
+        :return: (name, type, null table byte index, null table mask, valid null table position,
+                  fixed offset in the record, unpacker or None, converter or None, props)
+        """
+        props = column.extra_props or None
+        unpacker = FIXED_TYPE_STRUCTS.get(column.type)
+        converter = None
+        if column.type == TYPE_MONEY and props:
+            converter = lambda value: format_money(value, props)
+        elif column.type == TYPE_DATETIME:
+            converter = mdb_date_to_readable
+        return (column.col_name_str, column.type, *self._null_bit(column, null_bits),
+                self.fields_start + column.fixed_offset, unpacker and unpacker.unpack_from, converter, props)
+
+    def _compile_var_column(self, column, null_bits, columns):
+        """
+        :return: (name, type, null table byte index, null table mask, valid null table position, numeric scale,
+                  should the column be decoded)
+        """
+        scale = None
+        if column.type == TYPE_96_bit_17_BYTES:
+            # Get scale or None
+            scale = column.get('various', {}).get('scale', 6)
+        return (column.col_name_str, column.type, *self._null_bit(column, null_bits), scale,
+                columns is None or column.col_name_str in columns)
+
+    def decode(self, record):
+        """
+        Decode a record (row). First decode all fixed-length data fields and then the relative length data.
+        :param record: the row data
+        :return: dict of {column name: value}. Columns that could not be decoded are left out
+        """
+        row = {}
+        null_table_len = self.null_table_len
+        if not null_table_len or null_table_len >= len(record):
+            logging.error(f"Failed to parse null table column count {self._table.table_header.column_count}")
+            return row
+        record_len = len(record)
+        null_table = record_len - null_table_len
+
+        for name, column_type, null_byte, null_mask, null_valid, offset, unpack_from, converter, props in \
+                self.fixed_columns:
+            # The null table indicates null values in the row.
+            # The only exception is BOOL fields which are encoded in the null table
+            if null_valid:
+                has_value = (record[null_table + null_byte] & null_mask) != 0
+            else:
+                logging.warning("Invalid null table. Bool values may be wrong, deleted values may be shown in the db.")
+                has_value = None if column_type == TYPE_BOOLEAN else True
+            if column_type == TYPE_BOOLEAN:
+                row[name] = has_value
+                continue
+            if offset > record_len:
+                logging.error(f"Column offset is bigger than the length of the record {offset - self.fields_start}")
+                continue
+            if not has_value:
+                row[name] = None
+            elif unpack_from:
+                value = unpack_from(record, offset)[0]
+                row[name] = converter(value) if converter else value
+            else:
+                row[name] = parse_type(column_type, bytes(record[offset:]), version=self.version, props=props)
+
+        if self.has_var_columns:
+            metadata = self._table._parse_dynamic_length_records_metadata(record, null_table_len)
+            if metadata and metadata.variable_length_field_offsets:
+                self._decode_var_columns(record, metadata, null_table, row)
+        return row
+
+    def _decode_var_columns(self, record, relative_record_metadata, null_table, row):
+        """
+        Decode dynamic (non fixed length) columns from the row
+        :param record: the row data
+        :param relative_record_metadata: parsed record metadata
+        :param null_table: offset of the null table in the record
+        :param row: dict to add the decoded values to
+        """
+        relative_offsets = relative_record_metadata.variable_length_field_offsets
+        last_index = len(relative_offsets) - 1
+        jump_table_addition = 0
+        for i, (name, column_type, null_byte, null_mask, null_valid, scale, wanted) in enumerate(self.var_columns):
+            if null_valid:
+                has_value = (record[null_table + null_byte] & null_mask) != 0
+            else:
+                logging.warning("Invalid null table. null values may be shown in the db.")
+                has_value = True
+            if not has_value:
+                if wanted:
+                    row[name] = None
+                continue
+
+            if self.version == 3:
+                if i in relative_record_metadata.variable_length_jump_table:
+                    jump_table_addition += 0x100
+            if not wanted:
+                continue
+            rel_start = relative_offsets[i]
+            # If this is the last one use var_len_count as end offset
+            if i == last_index:
+                rel_end = relative_record_metadata.var_len_count
+            else:
+                rel_end = relative_offsets[i + 1]
+
+            # Empty values have a size and a hash too, check these modes before the empty slot
+            if column_type in (TYPE_MEMO, TYPE_OLE) and self.hash_algorithms:
+                row[name] = self._blob_hash(column_type,
+                                            record[rel_start + jump_table_addition: rel_end + jump_table_addition])
+                continue
+            if column_type in (TYPE_MEMO, TYPE_OLE) and self.blobs in (BLOBS_SIZE, BLOBS_SIZE_STORAGE):
+                row[name] = self._blob_size(record[rel_start + jump_table_addition: rel_end + jump_table_addition])
+                continue
+
+            # if rel_start and rel_end are the same there is no data in this slot
+            if rel_start == rel_end:
+                row[name] = ""
+                continue
+            relative_obj_data = bytes(record[rel_start + jump_table_addition: rel_end + jump_table_addition])
+            # Parse types that require column data here, call parse_type on all other types
+            if self.blobs == BLOBS_HANDLE and column_type in (TYPE_MEMO, TYPE_OLE):
+                try:
+                    parsed_type = BlobHandle(self._table, column_type, relative_obj_data)
+                except ConstructError:
+                    logging.warning("Failed to parse memo field. Using data as bytes")
+                    parsed_type = relative_obj_data
+            elif column_type == TYPE_MEMO:
+                try:
+                    parsed_type = self._table._parse_memo(relative_obj_data)
+                except ConstructError:
+                    logging.warning("Failed to parse memo field. Using data as bytes")
+                    parsed_type = relative_obj_data
+            elif column_type == TYPE_OLE:
+                try:
+                    parsed_type = self._table._parse_memo(relative_obj_data, return_raw=True)
+                except ConstructError:
+                    logging.warning("Failed to parse OLE field. Using data as bytes")
+                    parsed_type = relative_obj_data
+            elif column_type == TYPE_96_bit_17_BYTES:
+                if len(relative_obj_data) != 17:
+                    logging.warning(f"Relative numeric field has invalid length {len(relative_obj_data)}, expected 17")
+                    parsed_type = relative_obj_data
+                else:
+                    parsed_type = numeric_to_string(relative_obj_data, scale)
+            else:
+                parsed_type = parse_type(column_type, relative_obj_data, len(relative_obj_data), version=self.version)
+            row[name] = parsed_type
+
+    def _blob_size(self, data):
+        """
+        Get the size of a MEMO or OLE value from its MEMO header
+        :param data: the MEMO header of the value in the row
+        :return: byte length or (byte length, storage) by the blobs mode. Empty values are (0, MEMO_INLINE), values
+                 without a valid header are reported by the length of the data in the row, with a None storage
+        """
+        if not data:
+            length, storage = 0, MEMO_INLINE
+        else:
+            try:
+                length, storage, _ = parse_memo_header_fast(data)
+            except ConstructError:
+                logging.warning("Failed to parse memo field. Using the data length")
+                length, storage = len(data), None
+        if self.blobs == BLOBS_SIZE_STORAGE:
+            return length, storage
+        return length
+
+    def _blob_hash(self, column_type, data):
+        """
+        Hash a MEMO or OLE value while reading it
+        :param column_type: TYPE_MEMO or TYPE_OLE
+        :param data: the MEMO header of the value in the row
+        :return: dict of {algorithm: hex digest}. Empty values and values without a valid header are hashed as the data
+                 in the row
+        """
+        if data:
+            try:
+                return BlobHandle(self._table, column_type, data).hash(self.hash_algorithms)
+            except ConstructError:
+                logging.warning("Failed to parse memo field. Hashing data as bytes")
+        hashes = {algorithm: hashlib.new(algorithm, data) for algorithm in self.hash_algorithms}
+        return {algorithm: value_hash.hexdigest() for algorithm, value_hash in hashes.items()}
+
+
+class RecordFilter(object):
+    """
+    Filter of records (rows) compiled from simple predicates on fixed length columns. The predicates are evaluated on
+    the raw record - the null table bit of the column and a struct unpack at its fixed offset - so rows that do not
+    match are dropped before anything is decoded.
+    Comparisons with null values are false, like in SQL.
+    """
+    def __init__(self, access_table, where):
+        """
+        :param access_table: AccessTable the rows belong to
+        :param where: list of predicates that all have to match. A predicate is a (column name, operator, value) tuple,
+                      operator is one of ==, !=, <, <=, >, >=, in (value is a collection) or a (column name, operator)
+                      tuple with the is null / is not null operators
+        """
+        self.null_table_len = (access_table.table_header.column_count + 7) // 8
+        fields_start = 2 if access_table.version > 3 else 1
+        null_bits = self.null_table_len * 8
+        columns = {column.col_name_str: column for column in access_table.columns.values()}
+        # (null table byte index, null table mask, valid null table position, fixed offset in the record, field size,
+        #  unpacker or None for BOOLEAN, test of the value or None to test only if the column is null, expected null)
+        self.predicates = []
+        for predicate in where:
+            column_name, op, *value = predicate
+            column = columns.get(column_name)
+            if column is None:
+                raise ValueError(f"Column {column_name} not found in table")
+            if not column.column_flags.fixed_length or \
+                    (column.type != TYPE_BOOLEAN and column.type not in FILTER_TYPE_STRUCTS):
+                raise ValueError(f"Can not filter on column {column_name} of type {column.type}")
+            op = op.lower()
+            unpacker = FILTER_TYPE_STRUCTS.get(column.type)
+            null_position = RowDecoder._null_bit(column, null_bits)
+            offset = fields_start + column.fixed_offset
+            size = unpacker.size if unpacker else 0
+            unpack_from = unpacker.unpack_from if unpacker else None
+            if op in ("is null", "is not null"):
+                self.predicates.append((*null_position, offset, size, unpack_from, None, op == "is null"))
+                continue
+            if len(value) != 1:
+                raise ValueError(f"Operator {op} of column {column_name} needs a value")
+            value = value[0]
+            if op == "in":
+                values = {self._convert_value(column_name, column.type, x) for x in value}
+                test = values.__contains__
+            elif op in FILTER_OPERATORS:
+                test = self._make_test(FILTER_OPERATORS[op], self._convert_value(column_name, column.type, value))
+            else:
+                raise ValueError(f"Unsupported operator {op}")
+            self.predicates.append((*null_position, offset, size, unpack_from, test, False))
+
+    @staticmethod
+    def _make_test(compare, value):
+        return lambda raw: compare(raw, value)
+
+    @staticmethod
+    def _convert_value(column_name, column_type, value):
+        """
+        Convert a value to compare with to the raw representation of the column type. The conversion is exact, so
+        values that are stored in the column compare equal to their raw representation
+        """
+        if column_type == TYPE_DATETIME:
+            if isinstance(value, str):
+                value = RecordFilter._parse_datetime(column_name, value)
+            if not isinstance(value, datetime):
+                raise ValueError(f"Can not compare column {column_name} of type {column_type} to {value!r}")
+            return (value - ACCESS_EPOCH) / timedelta(days=1)
+        if column_type == TYPE_BOOLEAN:
+            if not isinstance(value, (bool, int)):
+                raise ValueError(f"Can not compare column {column_name} of type {column_type} to {value!r}")
+            return bool(value)
+        if not isinstance(value, (int, float, Decimal)):
+            raise ValueError(f"Can not compare column {column_name} of type {column_type} to {value!r}")
+        if column_type == TYPE_MONEY:
+            # Money is stored as value * 10000, scale in decimal to not get float rounding errors (19.99 * 10000 is
+            # 199899.99999999997). Values that are not a whole number of 1/10000 stay a Decimal and compare exactly
+            raw = Decimal(str(value)) * 10000
+            return int(raw) if raw == raw.to_integral_value() else raw
+        if column_type == TYPE_FLOAT32:
+            # FLOAT32 values are compared as the float32 the value is stored as
+            try:
+                return struct.unpack("<f", struct.pack("<f", value))[0]
+            except OverflowError:
+                return float(value)
+        return value
+
+    @staticmethod
+    def _parse_datetime(column_name, value):
+        """
+        Parse a date string in one of FILTER_DATETIME_FORMATS, the format parse returns dates in is one of them
+        """
+        for date_format in FILTER_DATETIME_FORMATS:
+            try:
+                return datetime.strptime(value, date_format)
+            except ValueError:
+                continue
+        raise ValueError(f"Can not compare column {column_name} to date {value!r}, "
+                         f"expected YYYY-MM-DD[ HH:MM:SS[.ffffff]]")
+
+    def match(self, record):
+        """
+        :param record: the row data
+        :return: True if the record matches all the predicates
+        """
+        record_len = len(record)
+        null_table_len = self.null_table_len
+        if not null_table_len or null_table_len >= record_len:
+            return False
+        null_table = record_len - null_table_len
+        for null_byte, null_mask, null_valid, offset, size, unpack_from, test, expect_null in self.predicates:
+            if null_valid:
+                has_value = (record[null_table + null_byte] & null_mask) != 0
+            else:
+                has_value = True
+            # Boolean fields are encoded in the null table and are never null
+            if unpack_from is None:
+                if test is None:
+                    if expect_null:
+                        return False
+                    continue
+                if not null_valid or not test(has_value):
+                    return False
+                continue
+            if test is None:
+                if has_value == expect_null:
+                    return False
+                continue
+            if not has_value or offset + size > record_len or not test(unpack_from(record, offset)[0]):
+                return False
+        return True
+
+
+class ColumnarDecoder(object):
+    """
+    Decode rows into columns. Columns of the COLUMNAR_DTYPES types are gathered from all the rows at once with numpy -
+    the null tables of the rows are unpacked in one pass and each column is read at its fixed offset from all the
+    records. Other columns are decoded row by row with a RowDecoder.
+    """
+    def __init__(self, access_table, columns=None):
+        """
+        :param access_table: AccessTable the rows belong to
+        :param columns: set of column names to decode, None for all columns
+        """
+        row_decoder = access_table._get_row_decoder(columns)
+        self.null_table_len = row_decoder.null_table_len
+        self.column_count = access_table.table_header.column_count
+        # (name, type, null table bit, valid null table position, fixed offset in the record, dtype)
+        self.array_columns = []
+        for name, column_type, null_byte, null_mask, null_valid, offset, *_ in row_decoder.fixed_columns:
+            if column_type in COLUMNAR_DTYPES:
+                null_bit = null_byte * 8 + null_mask.bit_length() - 1
+                self.array_columns.append((name, column_type, null_bit, null_valid, offset,
+                                           np.dtype(COLUMNAR_DTYPES[column_type])))
+        array_names = {column[0] for column in self.array_columns}
+        self.column_names = row_decoder.column_names
+        self.row_columns = [name for name in self.column_names if name not in array_names]
+        self._row_decoder = access_table._get_row_decoder(set(self.row_columns)) if self.row_columns else None
+
+    def decode(self, records):
+        """
+        Decode a batch of records
+        :param records: list of records
+        :return: dict of {column name: numpy masked array or list of values}
+        """
+        null_table_len = self.null_table_len
+        lengths = np.fromiter(map(len, records), dtype=np.int64, count=len(records))
+        # Rows without a valid null table are skipped, like AccessTable.parse does
+        if not null_table_len or (lengths <= null_table_len).any():
+            logging.error(f"Failed to parse null table column count {self.column_count}")
+            records = [record for record in records if null_table_len and len(record) > null_table_len]
+            lengths = lengths[lengths > null_table_len] if null_table_len else lengths[:0]
+        data = np.frombuffer(b"".join(records), dtype=np.uint8)
+        ends = np.cumsum(lengths)
+        starts = ends - lengths
+        # Unpack the null tables of all the rows
+        null_table_index = (ends - null_table_len)[:, None] + np.arange(null_table_len)
+        null_table = np.unpackbits(data[null_table_index], axis=1, bitorder="little").astype(bool)
+
+        columns = {}
+        for name, column_type, null_bit, null_valid, offset, dtype in self.array_columns:
+            if null_valid:
+                has_value = null_table[:, null_bit]
+            else:
+                logging.warning("Invalid null table. Bool values may be wrong, deleted values may be shown in the db.")
+                has_value = np.full(len(records), column_type != TYPE_BOOLEAN)
+            # Boolean fields are encoded in the null table
+            if column_type == TYPE_BOOLEAN:
+                columns[name] = np.ma.masked_array(has_value, mask=not null_valid)
+                continue
+            in_record = offset + dtype.itemsize <= lengths
+            field_index = np.minimum(starts[:, None] + offset + np.arange(dtype.itemsize), len(data) - 1)
+            values = np.ascontiguousarray(data[field_index]).view(dtype).ravel()
+            mask = ~(has_value & in_record)
+            if column_type == TYPE_DATETIME:
+                valid_dates = np.isfinite(values) & ~np.signbit(values) & (values < MAX_DATETIME_DAYS)
+                # Whole days and the day fraction are converted separately, like mdb_date_to_readable does
+                day_fraction, days = np.modf(np.where(valid_dates, values, 0))
+                epoch = np.datetime64(ACCESS_EPOCH, "us")
+                values = (epoch + days.astype("timedelta64[D]") +
+                          np.round(day_fraction * 86400e6).astype("timedelta64[us]"))
+                # Dates at ACCESS_EPOCH are empty dates - "(Empty Date)" in parse
+                mask |= ~valid_dates | (values == epoch)
+            columns[name] = np.ma.masked_array(values, mask=mask)
+
+        if self._row_decoder:
+            rows = [self._row_decoder.decode(record) for record in records]
+            for name in self.row_columns:
+                columns[name] = [row.get(name) for row in rows]
+        return {name: columns[name] for name in self.column_names}
+
+    def merge(self, chunks):
+        """
+        Merge the decoded batches of the table
+        :param chunks: dict of {column name: list of decoded batch columns}
+        :return: dict of {column name: numpy masked array or list of values}
+        """
+        merged = {}
+        for name, column_type, *_, dtype in self.array_columns:
+            if chunks.get(name):
+                merged[name] = np.ma.concatenate(chunks[name])
+            else:
+                empty_dtype = "datetime64[us]" if column_type == TYPE_DATETIME else dtype
+                merged[name] = np.ma.masked_array(np.empty(0, dtype=empty_dtype))
+        for name in self.row_columns:
+            merged[name] = list(itertools.chain.from_iterable(chunks.get(name, [])))
+        return {name: merged[name] for name in self.column_names}
+
+
+# Parsers opened by pool worker processes, by (db path, engine). Workers reuse them for all the tasks of the file
+_worker_parsers = {}
+
+
+def _get_worker_parser(db_path, engine):
+    parser = _worker_parsers.get((db_path, engine))
+    if parser is None:
+        parser = _worker_parsers[(db_path, engine)] = AccessParser(db_path, lazy=True, engine=engine)
+    return parser
+
+
+def _parse_table_pages(db_path, engine, table_name, page_numbers, columns, blobs=BLOBS_VALUE):
+    """
+    Pool worker - parse a range of the data pages of a table. The worker maps the file by itself, so only the page
+    numbers and the decoded values are sent between the processes.
+    :return: dict of {column name: list of values}
+    """
+    access_table = _get_worker_parser(db_path, engine).get_table(table_name)
+    return dict(access_table._parse_pages(page_numbers, columns, blobs))
+
+
+def _parse_whole_table(db_path, engine, table_name):
+    """
+    Pool worker - parse a table of the database
+    :return: defaultdict(list) with the parsed table or None if the table could not be found
+    """
+    access_table = _get_worker_parser(db_path, engine).get_table(table_name)
+    if access_table is None:
+        return None
+    return access_table.parse()
+
+
+def _split_pages(page_numbers, parts):
+    """
+    Split page numbers to contiguous ranges
+    :param page_numbers: list of page numbers
+    :param parts: maximal number of ranges
+    :return: list of page number lists, in page order
+    """
+    size = -(-len(page_numbers) // parts)
+    return [page_numbers[i:i + size] for i in range(0, len(page_numbers), size)]
 
 
 class AccessParser(object):
-    def __init__(self, db_path):
+    def __init__(self, db_path, lazy=False, engine=ENGINE_FAST):
+        """
+        :param db_path: path to the database file
+        :param lazy: defer work to the first time a table is used. Only the columns of the catalog that are needed to
+                     list the tables are parsed when opening the database, and the extra properties (LvProp) of a table
+                     are decoded when the table is requested.
+        :param engine: engine used to parse data page headers and record metadata. ENGINE_FAST (struct based) or
+                       ENGINE_CONSTRUCT (reference implementation)
+        """
+        self.db_path = os.path.abspath(db_path)
+        self.lazy = lazy
+        self.engine = engine
         self.db_data = read_db_file(db_path)
         self._parse_file_header(self.db_data)
-        self._table_defs, self._data_pages, self._all_pages = categorize_pages(self.db_data, self.page_size)
-        self._tables_with_data = self._link_tables_to_data()
+        self._pages = PageStore(self.db_data, self.page_size)
+        self._record_index = RecordOffsetIndex(self._pages, self.version, engine)
+        self._tables = {}
+        self._closed = False
+        # LvProp handles of the tables in the catalog, read and decoded on demand in lazy mode
+        self._tables_lvprop = {}
         self.catalog = self._parse_catalog()
-        self.extra_props = self.parse_msys_table()
+        self.extra_props = {} if lazy else self.parse_msys_table()
 
     def parse_msys_table(self):
         """The MSysObjects contains extra metadata about tables and columns, like the Format of money field types """
@@ -56,13 +909,36 @@ class AccessParser(object):
                                                                                   msys_table['LvProp']) if value}
         return table_to_lval_memo
 
+    def close(self):
+        """
+        Release the database file mapping. Tables and rows that were already parsed stay valid, using the parser after
+        it is closed raises ValueError. This includes iter_rows generators and BlobHandles of the parser, they raise
+        ValueError on the next row or read.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self._tables = {}
+        self._pages.close()
+
+    def _check_open(self):
+        if self._closed:
+            raise ValueError("I/O operation on closed database")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
     def _parse_file_header(self, db_data):
         """
         Parse the basic file header and determine the Access DB version based on the parsing results.
         :param db_data: db file data
         """
         try:
-            head = ACCESSHEADER.parse(db_data)
+            # The header is at the start of the first page, don't hand the whole file to construct
+            head = ACCESSHEADER.parse(db_data[:PAGE_SIZE_V3])
         except ConstructError:
             # This is a very minimal parsing of the header. If we fail this probable is not a valid mdb file
             raise ValueError("Failed to parse DB file header. Check it is a valid access database")
@@ -83,36 +959,35 @@ class AccessParser(object):
             self.page_size = PAGE_SIZE_V3
         logging.info(f"DataBase version {version}")
 
-    def _link_tables_to_data(self):
+    def _get_table_obj(self, table_page):
         """
-        Link tables definitions to their data pages
-        :return: dict of {ofssets : PageObj}
+        Get the table definition at table_page. Tables are linked to their data pages by AccessTable the first time
+        they are used, the TableObj is kept so this happens once per table.
+        :param table_page: page number of the table definition
+        :return: TableObj or None if there is no table definition at this page
         """
-        tables_with_data = {}
-        # Link table definitions to data
-        # the offset of the table definition page / 0x800  ==  the owner of a Data page
-        for offset, data in self._data_pages.items():
-            try:
-                parsed_dp = parse_data_page_header(data, version=self.version)
-            except ConstructError:
-                logging.error(f"Failed to parse data page {data}")
-                continue
-            page_offset = parsed_dp.owner * self.page_size
-            if page_offset in self._table_defs:
-                table_page_value = self._table_defs.get(parsed_dp.owner * self.page_size)
-                if page_offset not in tables_with_data:
-                    tables_with_data[page_offset] = TableObj(page_offset, table_page_value)
-                tables_with_data[page_offset].linked_pages.append(data)
-        return tables_with_data
+        self._check_open()
+        table = self._tables.get(table_page)
+        if not table:
+            if self._pages.page_type(table_page) != PAGE_TYPE_TABLE_DEF:
+                return None
+            table = TableObj(offset=table_page * self.page_size, val=self._pages.get_page(table_page))
+            self._tables[table_page] = table
+        return table
 
     def _parse_catalog(self):
         """
         Parse the catalog to get the DB tables and their offsets
         :return: dict {table : offset}
         """
-        catalog_page = self._tables_with_data[2 * self.page_size]
-        access_table = AccessTable(catalog_page, self.version, self.page_size, self._data_pages, self._table_defs)
-        catalog = access_table.parse()
+        catalog_page = self._get_table_obj(2)
+        access_table = AccessTable(catalog_page, self.version, self.page_size, self._pages, engine=self.engine,
+                                   record_index=self._record_index)
+        if self.lazy:
+            # LvProp values are kept as handles, only the LVAL pages of the tables that are used are read
+            catalog = access_table.parse(columns=CATALOG_COLUMNS + ["LvProp"], blobs=BLOBS_HANDLE)
+        else:
+            catalog = access_table.parse(columns=CATALOG_COLUMNS)
         tables_mapping = {}
         for i, table_name in enumerate(catalog['Name']):
             # We need the MSysObjects table for metadata so exclude it from the system table filter.
@@ -126,30 +1001,47 @@ class AccessParser(object):
                     tables_mapping[table_name] = catalog['Id'][i]
                 else:
                     logging.debug(f"Not parsing system table - {table_name}")
+        if self.lazy and catalog.get("LvProp"):
+            self._tables_lvprop = {table_name: lvprop for table_name, lvprop in zip(catalog['Name'], catalog['LvProp'])
+                                   if lvprop and table_name in tables_mapping}
         return tables_mapping
 
+    def _get_table_props(self, table_name):
+        """
+        Get the extra properties of the table columns from the MSysObjects table
+        :param table_name: table name
+        :return: dict of {column name: properties} or None
+        """
+        if table_name == "MSysObjects":
+            return None
+        if self.lazy and table_name in self._tables_lvprop:
+            lvprop = self._tables_lvprop.pop(table_name)
+            if isinstance(lvprop, BlobHandle):
+                lvprop = lvprop.read()
+            self.extra_props[table_name] = self.parse_lvprop(lvprop) if lvprop else None
+        if self.extra_props and table_name in self.extra_props:
+            return self.extra_props[table_name]
+        return None
+
     def get_table(self, table_name):
-        table_offset = self.catalog.get(table_name)
-        if not table_offset:
+        self._check_open()
+        table_page = self.catalog.get(table_name)
+        if not table_page:
             logging.error(f"Could not find table {table_name} in DataBase")
             return
-        table_offset = table_offset * self.page_size
-        table = self._tables_with_data.get(table_offset)
+        table = self._get_table_obj(table_page)
         if not table:
-            table_def = self._table_defs.get(table_offset)
-            if table_def:
-                table = TableObj(offset=table_offset, val=table_def)
-                logging.info(f"Table {table_name} has no data")
-            else:
-                logging.error(f"Could not find table {table_name} offset {table_offset}")
-                return
+            logging.error(f"Could not find table {table_name} offset {table_page * self.page_size}")
+            return
 
         # Try to get extra metadata for the table if it exists in the MSysObjects table
-        props = None
-        if table_name != "MSysObjects" and table_name in self.extra_props:
-            props = self.extra_props[table_name]
+        props = self._get_table_props(table_name)
 
-        return AccessTable(table, self.version, self.page_size, self._data_pages, self._table_defs, props)
+        access_table = AccessTable(table, self.version, self.page_size, self._pages, props, engine=self.engine,
+                                   record_index=self._record_index)
+        if not table.linked_pages:
+            logging.info(f"Table {table_name} has no data")
+        return access_table
 
     def parse_lvprop(self, lvprop_raw):
         try:
@@ -178,13 +1070,189 @@ class AccessParser(object):
             reconstructed_column_data[chunk.data.column_name] = data_values
         return reconstructed_column_data
 
-    def parse_table(self, table_name):
+    def parse_table(self, table_name, columns=None, workers=None, limit=None, offset=0, blobs=BLOBS_VALUE,
+                    hash_blobs=None):
         """
         Parse a table from the db.
         tables names are in self.catalog
+        :param table_name: table to parse
+        :param columns: names of the columns to parse, None for all columns. Columns that are not requested are not
+                        decoded at all, which skips following MEMO/OLE data to other pages.
+        :param workers: number of processes to decode the table with. The data pages are split to contiguous ranges
+                        that are decoded by a process pool, each worker opens the database file by itself. Ignored
+                        with limit or offset.
+        :param limit: maximal number of rows to parse, None for all rows
+        :param offset: number of rows to skip before parsing
+        :param blobs: how MEMO and OLE values are returned, one of BLOBS_MODES. Handles are bound to this parser, so
+                      workers are ignored with BLOBS_HANDLE.
+        :param hash_blobs: hashlib algorithm names, e.g. ("sha256",). MEMO and OLE values are returned as a dict of
+                           {algorithm: hex digest} of their raw bytes, hashed while their pages are read
         :return defaultdict(list) with the parsed table -- table[column][row_index]
         """
-        return self.get_table(table_name).parse()
+        _check_rows_range(limit, offset)
+        blobs = _blobs_mode(blobs, hash_blobs)
+        access_table = self.get_table(table_name)
+        page_numbers = access_table.table.linked_pages
+        if not workers or workers < 2 or not page_numbers or len(page_numbers) < 2 or limit is not None or offset or \
+                blobs == BLOBS_HANDLE:
+            return access_table.parse(columns=columns, limit=limit, offset=offset, blobs=blobs)
+        if columns is not None:
+            columns = set(columns)
+        # Make sure the decoder is compiled here, so unknown columns are reported once
+        access_table._get_row_decoder(columns, blobs)
+        page_ranges = _split_pages(page_numbers, workers * PAGE_RANGES_PER_WORKER)
+        parsed_table = defaultdict(list)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # map keeps the order of the page ranges
+            for chunk in executor.map(_parse_table_pages, itertools.repeat(self.db_path), itertools.repeat(self.engine),
+                                      itertools.repeat(table_name), page_ranges, itertools.repeat(columns),
+                                      itertools.repeat(blobs)):
+                for column_name, values in chunk.items():
+                    parsed_table[column_name].extend(values)
+        return parsed_table
+
+    def iter_rows(self, table_name, columns=None, where=None, blobs=BLOBS_VALUE, hash_blobs=None):
+        """
+        Iterate over the rows of a table from the db without keeping the whole table in memory.
+        tables names are in self.catalog
+        :param table_name: table to iterate
+        :param columns: names of the columns to parse, None for all columns
+        :param where: list of (column name, operator, value) predicates on fixed length columns, see RecordFilter
+        :param blobs: how MEMO and OLE values are returned, one of BLOBS_MODES
+        :param hash_blobs: hashlib algorithm names to return digests of MEMO and OLE values instead of the values
+        :return: generator of rows, each row is a dict of {column name: value}
+        """
+        return self.get_table(table_name).iter_rows(columns=columns, where=where, blobs=blobs, hash_blobs=hash_blobs)
+
+    def parse_all(self, workers=None, sink=None):
+        """
+        Parse all the tables of the db. With workers the tables are parsed by a process pool, the biggest tables (by the
+        number of rows in the table definition) are scheduled first so a big table does not start last.
+        :param workers: number of processes to parse the tables with, None to parse in this process
+        :param sink: callable(table_name, table) that gets every table as soon as it is parsed, in completion order.
+                     Tables that were given to the sink are not kept.
+        :return: dict of {table name: defaultdict(list) with the parsed table}, in catalog order
+        """
+        parsed_tables = {}
+
+        def collect(table_name, table):
+            if table is None:
+                return
+            if sink:
+                sink(table_name, table)
+            else:
+                parsed_tables[table_name] = table
+
+        table_names = sorted(self.catalog, key=self._get_table_row_count, reverse=True)
+        if not workers or workers < 2:
+            for table_name in table_names:
+                access_table = self.get_table(table_name)
+                collect(table_name, access_table.parse() if access_table else None)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = {executor.submit(_parse_whole_table, self.db_path, self.engine, table_name): table_name
+                           for table_name in table_names}
+                for future in as_completed(futures):
+                    collect(futures[future], future.result())
+        return {table_name: parsed_tables[table_name] for table_name in self.catalog if table_name in parsed_tables}
+
+    def _get_table_row_count(self, table_name):
+        """
+        :return: number of rows of the table from its table definition, 0 if it can not be parsed
+        """
+        table = self._get_table_obj(self.catalog[table_name])
+        if not table:
+            return 0
+        try:
+            return parse_table_head(table.value, version=self.version).number_of_rows
+        except ConstructError:
+            return 0
+
+    def open_blob(self, table_name, row, column):
+        """
+        Open a MEMO or OLE value as a read only file object, to copy or hash big values without holding them in memory.
+        :param table_name: table of the value
+        :param row: index of the value in the column list of parse_table
+        :param column: name of a MEMO or OLE column
+        :return: BlobReader of the raw bytes of the value or None if the value is null or empty
+        """
+        if row < 0:
+            raise IndexError(f"Row {row} is out of range of table {table_name}")
+        access_table = self.get_table(table_name)
+        column_types = {c.col_name_str: c.type for c in access_table.columns.values()}
+        if column_types.get(column) not in (TYPE_MEMO, TYPE_OLE):
+            raise ValueError(f"Column {column} is not a MEMO or OLE column of table {table_name}")
+        decoder = access_table._get_row_decoder({column}, BLOBS_HANDLE)
+        # Rows that can not be decoded are skipped like parse skips them, so row is the index parse_table returns
+        values = (decoded[column] for decoded in map(decoder.decode, access_table._iter_records())
+                  if column in decoded)
+        for handle in itertools.islice(values, row, row + 1):
+            if isinstance(handle, BlobHandle):
+                return handle.open()
+            return None
+        raise IndexError(f"Row {row} is out of range of table {table_name}")
+
+    def extract_blobs(self, output_dir, tables=None, algorithm="sha256", workers=8, manifest="manifest.csv"):
+        """
+        Extract all the OLE values of the db to a content addressed directory. Every value is stored once at
+        <output_dir>/<hash[:2]>/<hash> no matter how many cells hold it, and a manifest with the table, row, column,
+        hash and size of every value is written to the directory. The rows are walked with blob handles, the values
+        are hashed and written by a thread pool straight from the pages, so they are never held in memory.
+        :param output_dir: directory to extract to, created if it does not exist
+        :param tables: names of the tables to extract, None for all the tables in self.catalog
+        :param algorithm: hashlib algorithm of the content hashes
+        :param workers: number of threads to hash and write values with
+        :param manifest: file name of the manifest (CSV) in output_dir
+        :return: dict with the number of extracted values ("blobs") and of files written ("stored")
+        """
+        # Fail on unknown algorithms before anything is written
+        hashlib.new(algorithm)
+        os.makedirs(output_dir, exist_ok=True)
+        blob_store = _BlobStore(output_dir, algorithm)
+        blobs = 0
+        with ThreadPoolExecutor(max_workers=workers) as executor, \
+                open(os.path.join(output_dir, manifest), "w", newline="") as manifest_file:
+            writer = csv.writer(manifest_file)
+            writer.writerow(BLOB_MANIFEST_COLUMNS)
+            # Values are written to the manifest in the db order, bounded number of values wait for the threads
+            pending = deque()
+            for table_name, row, column, value in self._iter_ole_values(tables):
+                pending.append((table_name, row, column, executor.submit(blob_store.store, value)))
+                if len(pending) >= workers * BLOBS_PENDING_PER_WORKER:
+                    table_name, row, column, future = pending.popleft()
+                    writer.writerow([table_name, row, column, *future.result()])
+                    blobs += 1
+            while pending:
+                table_name, row, column, future = pending.popleft()
+                writer.writerow([table_name, row, column, *future.result()])
+                blobs += 1
+        return {"blobs": blobs, "stored": blob_store.stored}
+
+    def _iter_ole_values(self, tables=None):
+        """
+        Iterate over the OLE values of the db
+        :param tables: names of the tables, None for all the tables in self.catalog
+        :return: generator of (table name, row index, column name, BlobHandle or bytes) of the values that are not null
+                 or empty
+        """
+        for table_name in self.catalog if tables is None else tables:
+            access_table = self.get_table(table_name)
+            if access_table is None:
+                continue
+            ole_columns = [column.col_name_str for column in access_table.columns.values() if column.type == TYPE_OLE]
+            if not ole_columns:
+                continue
+            # Rows that can not be decoded are skipped like parse skips them, so the row index is the index of the value
+            # in the column list of parse_table and can be given to open_blob
+            row_indexes = dict.fromkeys(ole_columns, 0)
+            for row in access_table.iter_rows(columns=ole_columns, blobs=BLOBS_HANDLE):
+                for column in ole_columns:
+                    if column not in row:
+                        continue
+                    value = row[column]
+                    if value:
+                        yield table_name, row_indexes[column], column, value
+                    row_indexes[column] += 1
 
     def print_database(self):
         """
@@ -201,37 +1269,181 @@ class AccessParser(object):
 
 
 class AccessTable(object):
-    def __init__(self, table, version, page_size, data_pages, table_defs, props=None):
+    def __init__(self, table, version, page_size, pages, props=None, engine=ENGINE_FAST, record_index=None):
+        """
+        :param record_index: RecordOffsetIndex shared with the other tables of the database, None to use an index of
+                             this table only
+        """
         self.version = version
         self.props = props
         self.page_size = page_size
-        self._data_pages = data_pages
-        self._table_defs = table_defs
+        self._pages = pages
+        if record_index is None:
+            record_index = RecordOffsetIndex(pages, version, engine)
+        self._record_index = record_index
+        self._engine = engine
         self.table = table
         self.parsed_table = defaultdict(list)
         self.columns, self.primary_keys, self.table_header = self._get_table_columns()
+        self._row_decoders = {}
+        if self.table.linked_pages is None:
+            self.table.linked_pages = self._link_data_pages()
 
-    def create_empty_table(self):
+    def create_empty_table(self, columns=None):
         parsed_table = defaultdict(list)
-        columns, *_ = self._get_table_columns()
-        for i, column in columns.items():
-            parsed_table[column.col_name_str] = ""
+        for i, column in self.columns.items():
+            if columns is None or column.col_name_str in columns:
+                parsed_table[column.col_name_str] = ""
         return parsed_table
 
-    def parse(self):
+    def parse(self, columns=None, limit=None, offset=0, blobs=BLOBS_VALUE, hash_blobs=None):
         """
         This is the main table parsing function. We go through all of the data pages linked to the table, separate each
         data page to rows(records) and parse each record.
+        :param columns: names of the columns to parse, None for all columns
+        :param limit: maximal number of rows to parse, None for all rows. The data pages walk stops once there are enough
+                      rows
+        :param offset: number of rows to skip before parsing, the skipped rows are not decoded
+        :param blobs: how MEMO and OLE values are returned. BLOBS_VALUE decodes them, BLOBS_HANDLE returns a BlobHandle
+                      for every value so values that are not used are never read, BLOBS_SIZE and BLOBS_SIZE_STORAGE
+                      return only the size of the values without reading them
+        :param hash_blobs: hashlib algorithm names, e.g. ("sha256",). MEMO and OLE values are returned as a dict of
+                           {algorithm: hex digest} of their raw bytes. The LVAL pages are fed to the hashes while the
+                           chain is walked, so values are never held in memory
         :return defaultdict(list) with the parsed data -- table[column][row_index]
         """
+        _check_rows_range(limit, offset)
+        blobs = _blobs_mode(blobs, hash_blobs)
+        if columns is not None:
+            columns = set(columns)
+        if not self.table.linked_pages:
+            return self.create_empty_table(columns)
+        for record in self._iter_records(offset=offset, limit=limit):
+            self._parse_row(record, columns, blobs)
+        return self.parsed_table
+
+    def head(self, n=5, columns=None, blobs=BLOBS_VALUE, hash_blobs=None):
+        """
+        Parse the first rows of the table, for previews. Only the data pages of these rows are read.
+        :param n: number of rows
+        :param columns: names of the columns to parse, None for all columns
+        :param blobs: how MEMO and OLE values are returned, one of BLOBS_MODES
+        :param hash_blobs: hashlib algorithm names to return digests of MEMO and OLE values instead of the values
+        :return defaultdict(list) with the parsed data -- table[column][row_index]
+        """
+        _check_rows_range(n, 0)
+        blobs = _blobs_mode(blobs, hash_blobs)
+        if columns is not None:
+            columns = set(columns)
+        if not self.table.linked_pages:
+            return self.create_empty_table(columns)
+        return self._parse_records(self._iter_records(limit=n), columns, blobs)
+
+    def iter_rows(self, columns=None, where=None, blobs=BLOBS_VALUE, hash_blobs=None):
+        """
+        Iterate over the table rows. Data pages are decoded one at a time and rows are yielded as they are decoded, so
+        only the current page and row are kept in memory and nothing is added to self.parsed_table.
+        :param columns: names of the columns to parse, None for all columns
+        :param where: list of (column name, operator, value) predicates on fixed length columns, see RecordFilter.
+                      Rows are filtered on the raw record before they are decoded.
+        :param blobs: how MEMO and OLE values are returned, one of BLOBS_MODES
+        :param hash_blobs: hashlib algorithm names to return digests of MEMO and OLE values instead of the values
+        :return: generator of rows, each row is a dict of {column name: value}
+        """
+        blobs = _blobs_mode(blobs, hash_blobs)
+        if columns is not None:
+            columns = set(columns)
+        record_filter = RecordFilter(self, where) if where else None
+        return self._iter_rows(self._get_row_decoder(columns, blobs), record_filter)
+
+    def _iter_rows(self, decoder, record_filter=None):
+        if not self.table.linked_pages:
+            return
+        for records in self._iter_page_records():
+            for record in records:
+                # The records are views of the page, they can not be read once the database is closed
+                self._pages.check_open()
+                if record_filter is None or record_filter.match(record):
+                    yield decoder.decode(record)
+
+    def parse_columnar(self, columns=None):
+        """
+        Parse the table into columns. Fixed length BOOLEAN, INT8/16/32, FLOAT32/64, MONEY and DATETIME columns are
+        decoded straight into numpy masked arrays, gathering each column from all the rows of a data page at once. The
+        mask marks null values. MONEY values are the raw integers (value * 10000) and DATETIME values are datetime64.
+        Empty and invalid dates, which parse returns as "(Empty Date)" and "(Invalid Date)", are masked as well.
+        Other columns are lists, like in parse. Requires numpy.
+        :param columns: names of the columns to parse, None for all columns
+        :return: dict of {column name: numpy.ma.MaskedArray or list}
+        """
+        if np is None:
+            raise ImportError("parse_columnar requires numpy")
+        if columns is not None:
+            columns = set(columns)
+        decoder = ColumnarDecoder(self, columns)
+        chunks = defaultdict(list)
+        for batch in self._iter_record_batches(COLUMNAR_BATCH_ROWS):
+            for name, column in decoder.decode(batch).items():
+                chunks[name].append(column)
+        return decoder.merge(chunks)
+
+    def iter_batches(self, batch_size=65536, columns=None, columnar=False):
+        """
+        Iterate over the table in column oriented chunks of consecutive rows. Only the current batch is kept in memory,
+        whatever the size of the table is.
+        :param batch_size: maximal number of rows in a batch
+        :param columns: names of the columns to parse, None for all columns
+        :param columnar: decode the batches like parse_columnar, into numpy masked arrays. Requires numpy
+        :return: generator of dicts of {column name: list of values} (or numpy.ma.MaskedArray when columnar)
+        """
+        if batch_size < 1:
+            raise ValueError(f"Invalid batch size {batch_size}")
+        if columnar and np is None:
+            raise ImportError("columnar batches require numpy")
+        if columns is not None:
+            columns = set(columns)
+        if columnar:
+            return self._iter_batches(ColumnarDecoder(self, columns), batch_size, columnar)
+        return self._iter_batches(self._get_row_decoder(columns), batch_size, columnar)
+
+    def _iter_batches(self, decoder, batch_size, columnar):
+        if columnar:
+            for batch in self._iter_record_batches(batch_size):
+                yield decoder.decode(batch)
+            return
+        for batch in self._iter_record_batches(batch_size):
+            # Rows that could not be decoded are skipped, so the columns of a batch stay aligned
+            rows = [row for row in map(decoder.decode, batch) if row]
+            yield {name: [row.get(name) for row in rows] for name in decoder.column_names}
+
+    def _iter_record_batches(self, batch_size):
+        """
+        Group the records of consecutive data pages into batches
+        :param batch_size: maximal number of records in a batch
+        :return: generator of lists of records
+        """
         if not self.table.linked_pages:
-            return self.create_empty_table()
-        for data_chunk in self.table.linked_pages:
-            original_data = data_chunk
-            parsed_data = parse_data_page_header(original_data, version=self.version)
+            return
+        batch = []
+        for records in self._iter_page_records():
+            batch.extend(records)
+            while len(batch) >= batch_size:
+                yield batch[:batch_size]
+                batch = batch[batch_size:]
+        if batch:
+            yield batch
 
+    def _iter_page_records(self, page_numbers=None):
+        """
+        Walk the data pages linked to the table and separate each data page to rows(records)
+        :param page_numbers: data pages to walk, None for all the pages of the table
+        :return: generator of the list of records of each data page, in page order
+        """
+        for page_num in self.table.linked_pages if page_numbers is None else page_numbers:
+            original_data = self._pages.get_page(page_num)
+            records = []
             last_offset = None
-            for rec_offset in parsed_data.record_offsets:
+            for rec_offset in self._record_index.get(page_num):
                 # Deleted row - Just skip it
                 if rec_offset & 0x8000:
                     last_offset = rec_offset & 0xfff
@@ -247,113 +1459,109 @@ class AccessTable(object):
                     overflow_rec_ptr = struct.unpack("<I", overflow_rec_ptr)[0]
                     record = self._get_overflow_record(overflow_rec_ptr)
                     if record:
-                        self._parse_row(record)
+                        records.append(record)
                     continue
-                # First record is actually the last one - from offset until the end of the data
+                # First record is actually the last one - from offset until the end of the data.
+                # Records are views of the page, only the decoded values are copied out of it
                 if not last_offset:
                     record = original_data[rec_offset:]
                 else:
                     record = original_data[rec_offset:last_offset]
                 last_offset = rec_offset
                 if record:
-                    self._parse_row(record)
-        return self.parsed_table
+                    records.append(record)
+            yield records
 
-    def _parse_row(self, record):
+    def _parse_pages(self, page_numbers, columns=None, blobs=BLOBS_VALUE):
         """
-        parse record (row) of data. First parse all fixed-length data field and then parse the relative length data.
-        :param record: the current row data
-        :return:
+        Parse the rows of some of the data pages of the table, without adding them to self.parsed_table
+        :param page_numbers: data pages to parse
+        :param columns: set of column names to parse, None for all columns
+        :param blobs: how MEMO and OLE values are returned, one of BLOBS_MODES
+        :return: defaultdict(list) with the parsed data -- table[column][row_index]
         """
-        original_record = record
-        reverse_record = record[::-1]
-        # Records contain null bitmaps for columns. The number of bitmaps is the number of columns / 8 rounded up
-        null_table_len = (self.table_header.column_count + 7) // 8
-        if null_table_len and null_table_len < len(original_record):
-            null_table = record[-null_table_len:]
-            # Turn bitmap to a list of True False values
-            null_table = [((null_table[i // 8]) & (1 << (i % 8))) != 0 for i in range(len(null_table) * 8)]
-        else:
-            logging.error(f"Failed to parse null table column count {self.table_header.column_count}")
-            return
-        if self.version > 3:
-            field_count = struct.unpack_from("h", record)[0]
-            record = record[2:]
-        else:
-            field_count = struct.unpack_from("b", record)[0]
-            record = record[1:]
+        return self._parse_records(itertools.chain.from_iterable(self._iter_page_records(page_numbers)), columns,
+                                   blobs)
 
-        relative_records_column_map = {}
-        # Iterate columns
-        for i, column in self.columns.items():
-            # Fixed length columns are handled before variable length. If this is a variable length column add it to
-            # mapping and continue
-            if not column.column_flags.fixed_length:
-                relative_records_column_map[i] = column
-                continue
+    def _parse_records(self, records, columns=None, blobs=BLOBS_VALUE):
+        """
+        Parse records (rows) into a new table, without adding them to self.parsed_table
+        :param records: iterable of records
+        :param columns: set of column names to parse, None for all columns
+        :param blobs: how MEMO and OLE values are returned, one of BLOBS_MODES
+        :return: defaultdict(list) with the parsed data -- table[column][row_index]
+        """
+        parsed_table = defaultdict(list)
+        decoder = self._get_row_decoder(columns, blobs)
+        for record in records:
+            for column_name, value in decoder.decode(record).items():
+                parsed_table[column_name].append(value)
+        return parsed_table
 
-            self._parse_fixed_length_data(record, column, null_table)
-        if relative_records_column_map:
-            relative_records_column_map = dict(sorted(relative_records_column_map.items()))
-            metadata = self._parse_dynamic_length_records_metadata(reverse_record, original_record,
-                                                                   null_table_len)
-            if not metadata:
-                return
-            if metadata.variable_length_field_offsets:
-                self._parse_dynamic_length_data(original_record, metadata, relative_records_column_map, null_table)
-
-    def _parse_fixed_length_data(self, original_record, column, null_table):
-        """
-        Parse fixed-length data from record
-        :param original_record: unmodified record
-        :param column: column this data belongs to
-        :param null_table: null table of the row
-        """
-        column_name = column.col_name_str
-        # The null table indicates null values in the row.
-        # The only exception is BOOL fields which are encoded in the null table
-        has_value = True
-        if column.column_id > len(null_table):
-            logging.warning("Invalid null table. Bool values may be wrong, deleted values may be shown in the db.")
-            if column.type == TYPE_BOOLEAN:
-                has_value = None
-        else:
-            has_value = null_table[column.column_id]
-        # Boolean fields are encoded in the null table
-        if column.type == TYPE_BOOLEAN:
-            parsed_type = has_value
-        else:
-            if column.fixed_offset > len(original_record):
-                logging.error(f"Column offset is bigger than the length of the record {column.fixed_offset}")
-                return
-            record = original_record[column.fixed_offset:]
-            parsed_type = parse_type(column.type, record, version=self.version, props=column.extra_props or None)
-            if not has_value:
-                self.parsed_table[column_name].append(None)
-                return
-        self.parsed_table[column_name].append(parsed_type)
+    def _iter_records(self, offset=0, limit=None):
+        """
+        Iterate over the live records of the table. The data pages are walked lazily, so pages after the last needed
+        record are not read.
+        :param offset: number of records to skip
+        :param limit: maximal number of records, None for all records
+        :return: generator of records
+        """
+        records = itertools.chain.from_iterable(self._iter_page_records())
+        stop = None if limit is None else offset + limit
+        return itertools.islice(records, offset, stop)
+
+    def _get_row_decoder(self, columns=None, blobs=BLOBS_VALUE):
+        """
+        Get the compiled row decoder of this table, decoders are cached per set of columns and blobs mode
+        :param columns: set of column names to decode, None for all columns
+        :param blobs: how MEMO and OLE values are returned, one of BLOBS_MODES
+        :return: RowDecoder
+        """
+        key = (frozenset(columns) if columns is not None else None, blobs)
+        decoder = self._row_decoders.get(key)
+        if decoder is None:
+            if columns is not None:
+                missing_columns = set(columns) - {column.col_name_str for column in self.columns.values()}
+                if missing_columns:
+                    logging.warning(f"Columns {sorted(missing_columns)} not found in table")
+            decoder = self._row_decoders[key] = RowDecoder(self, columns, blobs)
+        return decoder
+
+    def _parse_row(self, record, columns=None, blobs=BLOBS_VALUE):
+        """
+        parse record (row) of data and add it to the parsed table
+        :param record: the current row data
+        :param columns: set of column names to parse, None for all columns
+        :param blobs: how MEMO and OLE values are returned, one of BLOBS_MODES
+        """
+        for column_name, value in self._get_row_decoder(columns, blobs).decode(record).items():
+            self.parsed_table[column_name].append(value)
+
+    def _parse_record_metadata(self, record, end, variable_jump_tables_cnt=0):
+        """
+        Parse the relative records metadata that ends at offset end of the record
+        """
+        if self._engine == ENGINE_FAST:
+            return parse_relative_object_metadata_fast(record, end, variable_jump_tables_cnt, self.version)
+        # The construct structs parse the metadata from the bottom up, on the record in reverse
+        return parse_relative_object_metadata_struct(bytes(record[:end])[::-1], variable_jump_tables_cnt, self.version)
 
-    def _parse_dynamic_length_records_metadata(self, reverse_record, original_record, null_table_length):
+    def _parse_dynamic_length_records_metadata(self, record, null_table_length):
         """
         parse the metadata of relative records. The metadata used to parse relative records is found at the end of the
-        record so reverse_record is used for parsing from the bottom up.
-        :param reverse_record: original record in reverse
-        :param original_record: unmodified record
+        record, right before the null table, and is parsed from the bottom up.
+        :param record: unmodified record
         :param null_table_length:
         :return: parsed relative record metadata
         """
+        metadata_end = len(record) - null_table_length
         if self.version > 3:
-            reverse_record = reverse_record[null_table_length:]
-            return parse_relative_object_metadata_struct(reverse_record, version=self.version)
+            return self._parse_record_metadata(record, metadata_end)
         # Parse relative metadata.
-        # Metadata is from the end of the record(reverse_record is used here)
-        variable_length_jump_table_cnt = (len(original_record) - 1) // 256
-        reverse_record = reverse_record[null_table_length:]
+        variable_length_jump_table_cnt = (len(record) - 1) // 256
         try:
-            relative_record_metadata = parse_relative_object_metadata_struct(reverse_record,
-                                                                             variable_length_jump_table_cnt,
-                                                                             self.version)
-            # relative_record_metadata = RELATIVE_OBJS.parse(reverse_record)
+            relative_record_metadata = self._parse_record_metadata(record, metadata_end,
+                                                                   variable_length_jump_table_cnt)
             # we use this offset in original_record so we have to update the length with the null_tables
             relative_record_metadata.relative_metadata_end = relative_record_metadata.relative_metadata_end + null_table_length
         except ConstructError:
@@ -364,17 +1572,16 @@ class AccessTable(object):
                 relative_record_metadata.variable_length_field_count != self.table_header.variable_columns:
 
             # best effort - try to find variable column count in the record and parse from there
-            # this is limited to the 10 first bytes to reduce false positives.
+            # this is limited to the 10 last bytes before the null table to reduce false positives.
             # most of the time iv'e seen this there was an extra DWORD before the actual metadata
-            metadata_start = reverse_record.find(bytes([self.table_header.variable_columns]))
-            if metadata_start != -1 and metadata_start < 10:
-                reverse_record = reverse_record[metadata_start:]
+            metadata_start = next((i for i in range(min(10, metadata_end))
+                                   if record[metadata_end - 1 - i] == self.table_header.variable_columns), -1)
+            if metadata_start != -1:
                 try:
-                    relative_record_metadata = parse_relative_object_metadata_struct(reverse_record,
-                                                                                     variable_length_jump_table_cnt,
-                                                                                     self.version)
+                    relative_record_metadata = self._parse_record_metadata(record, metadata_end - metadata_start,
+                                                                           variable_length_jump_table_cnt)
                 except ConstructError:
-                    logging.error(f"Failed to parse record metadata: {original_record}")
+                    logging.error(f"Failed to parse record metadata: {bytes(record)}")
                 relative_record_metadata.relative_metadata_end = relative_record_metadata.relative_metadata_end + \
                                                                  metadata_start
             else:
@@ -384,77 +1591,13 @@ class AccessTable(object):
                 return None
         return relative_record_metadata
 
-    def _parse_dynamic_length_data(self, original_record, relative_record_metadata,
-                                   relative_records_column_map, null_table):
-        """
-        Parse dynamic (non fixed length) records from row
-        :param original_record: full unmodified record
-        :param relative_record_metadata: parsed record metadata
-        :param relative_records_column_map: relative records colum mapping {index: column}
-        :param null_table: list indicating which columns have null value
-        """
-        relative_offsets = relative_record_metadata.variable_length_field_offsets
-        jump_table_addition = 0
-        for i, column_index in enumerate(relative_records_column_map):
-            column = relative_records_column_map[column_index]
-            col_name = column.col_name_str
-            has_value = True
-            if column.column_id > len(null_table):
-                logging.warning("Invalid null table. null values may be shown in the db.")
-            else:
-                has_value = null_table[column.column_id]
-            if not has_value:
-                self.parsed_table[col_name].append(None)
-                continue
-
-            if self.version == 3:
-                if i in relative_record_metadata.variable_length_jump_table:
-                    jump_table_addition += 0x100
-            rel_start = relative_offsets[i]
-            # If this is the last one use var_len_count as end offset
-            if i + 1 == len(relative_offsets):
-                rel_end = relative_record_metadata.var_len_count
-            else:
-                rel_end = relative_offsets[i + 1]
-
-            # if rel_start and rel_end are the same there is no data in this slot
-            if rel_start == rel_end:
-                self.parsed_table[col_name].append("")
-                continue
-
-            relative_obj_data = original_record[rel_start + jump_table_addition: rel_end + jump_table_addition]
-            # Parse types that require column data here, call parse_type on all other types
-            if column.type == TYPE_MEMO:
-                try:
-                    parsed_type = self._parse_memo(relative_obj_data)
-                except ConstructError:
-                    logging.warning("Failed to parse memo field. Using data as bytes")
-                    parsed_type = relative_obj_data
-            elif column.type == TYPE_OLE:
-                try:
-                    parsed_type = self._parse_memo(relative_obj_data, return_raw=True)
-                except ConstructError:
-                    logging.warning("Failed to parse OLE field. Using data as bytes")
-                    parsed_type = relative_obj_data
-            elif column.type == TYPE_96_bit_17_BYTES:
-                if len(relative_obj_data) != 17:
-                    logging.warning(f"Relative numeric field has invalid length {len(relative_obj_data)}, expected 17")
-                    parsed_type = relative_obj_data
-                else:
-                    # Get scale or None
-                    scale = column.get('various', {}).get('scale', 6)
-                    parsed_type = numeric_to_string(relative_obj_data, scale)
-            else:
-                parsed_type = parse_type(column.type, relative_obj_data, len(relative_obj_data), version=self.version)
-            self.parsed_table[col_name].append(parsed_type)
-
     def _get_table_columns(self):
         """
         Parse columns for a specific table
         """
         try:
             table_header = parse_table_head(self.table.value, version=self.version)
-            merged_data = self.table.value[table_header.tdef_header_end:]
+            merged_data = bytes(self.table.value[table_header.tdef_header_end:])
             if table_header.TDEF_header.next_page_ptr:
                 merged_data = merged_data + self._merge_table_data(table_header.TDEF_header.next_page_ptr)
 
@@ -474,7 +1617,7 @@ class AccessTable(object):
             table_header["index_names"] = parsed_data["index_names"]
 
         except ConstructError:
-            logging.error(f"Failed to parse table header {self.table.value}")
+            logging.error(f"Failed to parse table header {bytes(self.table.value)}")
             return
         col_names = table_header.column_names
         columns = table_header.column
@@ -512,20 +1655,40 @@ class AccessTable(object):
             logging.debug(f"expected {table_header.column_count} columns got {len(column_dict)}")
         return column_dict, primary_keys, table_header
 
+    def _link_data_pages(self):
+        """
+        Find the data pages of the table using its usage map (row_page_map), so only the pages of this table are
+        touched. Pages in the map are verified to be data pages owned by this table. If the usage map can't be decoded
+        fall back to checking the owner of every data page in the database.
+        :return: list of data page numbers
+        """
+        table_page = self.table.offset // self.page_size
+        usage_map = self._get_overflow_record(self.table_header.row_page_map)
+        map_pages = decode_usage_map(usage_map, self._pages)
+        if map_pages is None:
+            logging.warning(f"Failed to decode usage map of table at page {table_page}, scanning all data pages")
+            return self._pages.directory.pages_owned_by(table_page)
+        return [page_num for page_num in map_pages if self._pages.data_page_owner(page_num) == table_page]
+
     def _merge_table_data(self, first_page):
         """
         Merege data of tdef pages in case the data does not fit in one page
         :param first_page: index of the next page
         :return: merged data from all linked table definitions
         """
-        table = self._table_defs.get(first_page * self.page_size)
+        table = self._get_table_def_page(first_page)
         parsed_header = TDEF_HEADER.parse(table)
-        data = table[parsed_header.header_end:]
+        data = [table[parsed_header.header_end:]]
         while parsed_header.next_page_ptr:
-            table = self._table_defs.get(parsed_header.next_page_ptr * self.page_size)
+            table = self._get_table_def_page(parsed_header.next_page_ptr)
             parsed_header = TDEF_HEADER.parse(table)
-            data = data + table[parsed_header.header_end:]
-        return data
+            data.append(table[parsed_header.header_end:])
+        return b"".join(data)
+
+    def _get_table_def_page(self, page_num):
+        if self._pages.page_type(page_num) != PAGE_TYPE_TABLE_DEF:
+            return None
+        return self._pages.get_page(page_num)
 
     def _parse_memo(self, relative_obj_data, return_raw=False):
         logging.debug(f"Parsing memo field {relative_obj_data}")
@@ -543,41 +1706,54 @@ class AccessTable(object):
         elif parsed_memo.memo_length & 0x40000000:
             logging.debug("LVAL type 1")
             memo_data = self._get_overflow_record(parsed_memo.record_pointer)
+            memo_data = bytes(memo_data) if memo_data else None
         else:
             logging.debug("LVAL type 2")
-            rec_data = self._get_overflow_record(parsed_memo.record_pointer)
-            next_page = struct.unpack("I", rec_data[:4])[0]
-            # LVAL2 has data over multiple pages. The first 4 bytes of the page are the next record, then that data.
-            # Concat the data until we get a 0 next_page.
-            memo_data = b""
-            while next_page:
-                memo_data += rec_data[4:]
-                rec_data = self._get_overflow_record(next_page)
-                next_page = struct.unpack("I", rec_data[:4])[0]
-            memo_data += rec_data[4:]
+            # The chunks are views of the pages, the data is copied once when they are joined
+            memo_data = b"".join(self._iter_lval_chunks(parsed_memo.record_pointer))
         if memo_data:
             if return_raw:
                 return memo_data
             parsed_type = parse_type(memo_type, memo_data, len(memo_data), version=self.version)
             return parsed_type
 
+    def _iter_lval_chunks(self, record_pointer):
+        """
+        Walk a LVAL type 2 chain. LVAL2 has data over multiple pages. The first 4 bytes of every record are the pointer
+        to the next record, then that data. The chain ends with a 0 pointer.
+        :param record_pointer: pointer to the first record of the chain
+        :return: generator of memoryviews of the data of each record, in chain order
+        """
+        seen = set()
+        while record_pointer:
+            if record_pointer in seen:
+                logging.warning(f"LVAL chain loops back to record pointer {record_pointer}")
+                return
+            seen.add(record_pointer)
+            rec_data = self._get_overflow_record(record_pointer)
+            if rec_data is None or len(rec_data) < 4:
+                logging.warning(f"Failed to get LVAL chain record pointer {record_pointer}")
+                return
+            yield rec_data[4:]
+            record_pointer = struct.unpack_from("<I", rec_data)[0]
+
     def _get_overflow_record(self, record_pointer):
         """
         Get the actual record from a record pointer
         :param record_pointer:
-        :return: record
+        :return: zero-copy view of the record or None
         """
         record_offset = record_pointer & 0xff
         page_num = record_pointer >> 8
-        record_page = self._data_pages.get(page_num * self.page_size)
-        if not record_page:
+        if self._pages.page_type(page_num) != PAGE_TYPE_DATA:
             logging.warning(f"Could not find overflow record data page overflow pointer: {record_pointer}")
             return
-        parsed_data = parse_data_page_header(record_page, version=self.version)
-        if record_offset > len(parsed_data.record_offsets):
+        record_page = self._pages.get_page(page_num)
+        record_offsets = self._record_index.get(page_num)
+        if record_offset >= len(record_offsets):
             logging.warning("Failed parsing overflow record offset")
             return
-        start = parsed_data.record_offsets[record_offset]
+        start = record_offsets[record_offset]
         if start & 0x8000:
             start = start & 0xfff
         else:
@@ -585,7 +1761,7 @@ class AccessTable(object):
         if record_offset == 0:
             record = record_page[start:]
         else:
-            end = parsed_data.record_offsets[record_offset - 1]
+            end = record_offsets[record_offset - 1]
             if end & 0x8000 and (end & 0xff != 0):
                 end = end & 0xfff
             record = record_page[start: end]
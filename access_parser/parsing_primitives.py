@@ -1,5 +1,16 @@
+import struct
+from collections import namedtuple
+from functools import lru_cache
+
 from construct import *
 
+from .utils import DATA_PAGE_MAGIC
+
+# Parsing engines for the per page and per row structures. The construct engine is the reference implementation, the
+# fast engine decodes the same fixed layouts with precompiled struct.Struct objects
+ENGINE_CONSTRUCT = "construct"
+ENGINE_FAST = "fast"
+
 
 def version_specific(version, v3_subcon, v4_subcon):
     """
@@ -105,18 +116,23 @@ LVPROP = Struct(
     "leftover" / GreedyBytes
 )
 
-def parse_table_head(buffer, version=3):
+# The parsing structs below depend on the version (and some on counts from the table definition) so they are built once
+# per key and cached. Conditions that only depend on the key are resolved when building the struct instead of using a
+# lambda, which lets the hot ones be compiled with construct's compiler.
+
+@lru_cache(maxsize=None)
+def _table_head_struct(version):
     return Struct(
         "TDEF_header" / TDEF_HEADER,
         # Table
         "table_definition_length" / Int32ul,
-        "ver4_unknown" / If(lambda x: version > 3, Int32ul),
+        "ver4_unknown" / If(version > 3, Int32ul),
         "number_of_rows" / Int32ul,
         "autonumber" / Int32ul,
-        "autonumber_increment" / If(lambda x: version > 3, Int32ul),
-        "complex_autonumber" / If(lambda x: version > 3, Int32ul),
-        "ver4_unknown_1" / If(lambda x: version > 3, Int32ul),
-        "ver4_unknown_2" / If(lambda x: version > 3, Int32ul),
+        "autonumber_increment" / If(version > 3, Int32ul),
+        "complex_autonumber" / If(version > 3, Int32ul),
+        "ver4_unknown_1" / If(version > 3, Int32ul),
+        "ver4_unknown_2" / If(version > 3, Int32ul),
         # 0x53 system table
         # 0x4e user table
         "table_type_flags" / Int8ul,
@@ -127,14 +143,19 @@ def parse_table_head(buffer, version=3):
         "real_index_count" / Int32ul,
         "row_page_map" / Int32ul,
         "free_space_page_map" / Int32ul,
-        "tdef_header_end" / Tell).parse(buffer)
+        "tdef_header_end" / Tell)
 
 
-def parse_table_data(buffer, index_count, real_index_count, column_count, version=3):
+def parse_table_head(buffer, version=3):
+    return _table_head_struct(version).parse(buffer)
+
+
+@lru_cache(maxsize=256)
+def _table_data_struct(index_count, real_index_count, column_count, version):
     REAL_INDEX = Struct(
         "unk1" / Int32ul,
         "index_row_count" / Int32ul,
-        "ver4_always_zero" /  If(lambda x: version > 3, Int32ul))
+        "ver4_always_zero" /  If(version > 3, Int32ul))
 
     VARIOUS_TEXT_V3 = Struct(
         "LCID" / Int16ul,
@@ -167,11 +188,11 @@ def parse_table_data(buffer, index_count, real_index_count, column_count, versio
 
     COLUMN = Struct(
         "type" / Int8ul,
-        "ver4_unknown_3" /  If(lambda x: version > 3, Int32ul),
+        "ver4_unknown_3" /  If(version > 3, Int32ul),
         "column_id" / Int16ul,
         "variable_column_number" / Int16ul,
         "column_index" / Int16ul,
-        "various" / Switch(lambda ctx: ctx.type,
+        "various" / Switch(this.type,
                            {
                                9: VARIOUS_TEXT,
                                10: VARIOUS_TEXT,
@@ -190,27 +211,27 @@ def parse_table_data(buffer, index_count, real_index_count, column_count, versio
 
                            }, default=version_specific(version, Bytes(6), Bytes(4))),
         "column_flags" / version_specific(version, VERSION_3_FLAGS, VERSION_4_FLAGS),
-        "ver4_unknown_4" / If(lambda x: version > 3, Int32ul),
+        "ver4_unknown_4" / If(version > 3, Int32ul),
         "fixed_offset" / Int16ul,
         "length" / Int16ul)
 
     COLUMN_NAMES = Struct(
         "col_name_len" / version_specific(version, Int8ul, Int16ul),
         "col_name_str" / version_specific(version,
-                                          PaddedString(lambda x: x.col_name_len, encoding="utf8"),
-                                          PaddedString(lambda x: x.col_name_len, encoding="utf16")),
+                                          PaddedString(this.col_name_len, encoding="utf8"),
+                                          PaddedString(this.col_name_len, encoding="utf16")),
     )
 
     REAL_INDEX2 = Struct(
-        "unknown_b1" / If(lambda x: version > 3, Int32ul),
+        "unknown_b1" / If(version > 3, Int32ul),
         "unk_struct" / Array(10, Struct("col_id" / Int16ul, "idx_flags" / Int8ul)),
         "runk" / Int32ul,
         "first_index_page" / Int32ul,
         "flags" / Int8ul,
-        "unknown_b3" / If(lambda x: version > 3, Padding(9)))
+        "unknown_b3" / If(version > 3, Padding(9)))
 
     ALL_INDEXES = Struct(
-        "unknown_c1" / If(lambda x: version > 3, Int32ul),
+        "unknown_c1" / If(version > 3, Int32ul),
         "idx_num" / Int32ul,
         "idx_col_num" / Int32ul,
         "rel_tbl_type" / Int8ul,
@@ -219,13 +240,13 @@ def parse_table_data(buffer, index_count, real_index_count, column_count, versio
         "cascade_ups" / Int8ul,
         "cascade_dels" / Int8ul,
         "idx_type" / Int8ul,
-        "unknown_c2" / If(lambda x: version > 3, Int32ul))
+        "unknown_c2" / If(version > 3, Int32ul))
 
     INDEX_NAMES = Struct(
         "idx_name_len" / version_specific(version, Int8ul, Int16ul),
         "idx_name_str" / version_specific(version,
-                                          PaddedString(lambda x: x.idx_name_len, encoding="utf8"),
-                                          PaddedString(lambda x: x.idx_name_len, encoding="utf16")),
+                                          PaddedString(this.idx_name_len, encoding="utf8"),
+                                          PaddedString(this.idx_name_len, encoding="utf16")),
     )
 
     return Struct(
@@ -234,28 +255,158 @@ def parse_table_data(buffer, index_count, real_index_count, column_count, versio
         "column_names" / Array(column_count, COLUMN_NAMES),
         "real_index_2" / Array(real_index_count, REAL_INDEX2),
         "all_indexes" / Array(index_count, ALL_INDEXES),
-        "index_names" /  Array(index_count, INDEX_NAMES)).parse(buffer)
+        "index_names" /  Array(index_count, INDEX_NAMES))
 
 
-def parse_data_page_header(buffer, version=3):
+def parse_table_data(buffer, index_count, real_index_count, column_count, version=3):
+    return _table_data_struct(index_count, real_index_count, column_count, version).parse(buffer)
+
+
+@lru_cache(maxsize=None)
+def _data_page_header_struct(version):
+    # Parsed for every data page and every overflow record lookup
     return Struct(
         Const(b"\x01\x01"),
         "data_free_space" / Int16ul,
         "owner" / Int32ul,
-        "ver4_unknown_dat1" / If(lambda x: version > 3, Int32ul),
+        "ver4_unknown_dat1" / If(version > 3, Int32ul),
         "record_count" / Int16ul,
-        "record_offsets" / Array(lambda x: x.record_count, Int16ul)).parse(buffer)
+        "record_offsets" / Array(this.record_count, Int16ul)).compile()
 
 
-# buffer should be the record data in reverse
-def parse_relative_object_metadata_struct(buffer, variable_jump_tables_cnt=0, version=3):
+def parse_data_page_header(buffer, version=3):
+    try:
+        return _data_page_header_struct(version).parse(buffer)
+    except struct.error as e:
+        # Compiled structs raise struct errors on short buffers instead of StreamError
+        raise StreamError(f"Failed to parse data page header: {e}")
+
+
+@lru_cache(maxsize=None)
+def _relative_object_metadata_struct(variable_jump_tables_cnt, version):
+    # Parsed for every row
     return Struct(
         "variable_length_field_count" / version_specific(version, Int8ub, Int16ub),
-        "variable_length_jump_table" / If(lambda x: version == 3, Array(variable_jump_tables_cnt, Int8ub)),
+        "variable_length_jump_table" / If(version == 3, Array(variable_jump_tables_cnt, Int8ub)),
         # This currently supports up to 255 columns for versions > 3
         "variable_length_field_offsets" / version_specific(version,
-                                                           Array(lambda x: x.variable_length_field_count, Int8ub),
-                                                           Array(lambda x: x.variable_length_field_count & 0xff,
+                                                           Array(this.variable_length_field_count, Int8ub),
+                                                           Array(this.variable_length_field_count & 0xff,
                                                                  Int16ub)),
         "var_len_count" / version_specific(version, Int8ub, Int16ub),
-        "relative_metadata_end" / Tell).parse(buffer)
+        "relative_metadata_end" / Tell).compile()
+
+
+# buffer should be the record data in reverse
+def parse_relative_object_metadata_struct(buffer, variable_jump_tables_cnt=0, version=3):
+    try:
+        return _relative_object_metadata_struct(variable_jump_tables_cnt, version).parse(buffer)
+    except struct.error as e:
+        raise StreamError(f"Failed to parse record metadata: {e}")
+
+
+# Fast engine - same fields as the construct structs above, errors are raised as construct errors so callers handle both
+# engines the same way
+
+DataPageHeader = namedtuple("DataPageHeader", ["data_free_space", "owner", "ver4_unknown_dat1", "record_count",
+                                               "record_offsets"])
+
+DATA_PAGE_HEADER_V3 = struct.Struct("<2sHIH")
+DATA_PAGE_HEADER_V4 = struct.Struct("<2sHIIH")
+RECORD_FIELD_COUNT_V4 = struct.Struct("<H")
+
+
+def parse_data_page_header_fast(buffer, version=3):
+    try:
+        if version == 3:
+            magic, data_free_space, owner, record_count = DATA_PAGE_HEADER_V3.unpack_from(buffer)
+            ver4_unknown_dat1 = None
+            offsets_start = DATA_PAGE_HEADER_V3.size
+        else:
+            magic, data_free_space, owner, ver4_unknown_dat1, record_count = DATA_PAGE_HEADER_V4.unpack_from(buffer)
+            offsets_start = DATA_PAGE_HEADER_V4.size
+        record_offsets = struct.unpack_from(f"<{record_count}H", buffer, offsets_start)
+    except struct.error as e:
+        raise StreamError(f"Failed to parse data page header: {e}")
+    if magic != DATA_PAGE_MAGIC:
+        raise ConstError(f"parsing expected {DATA_PAGE_MAGIC} but parsed {magic}")
+    return DataPageHeader(data_free_space, owner, ver4_unknown_dat1, record_count, record_offsets)
+
+
+class RelativeObjectMetadata(object):
+    __slots__ = ("variable_length_field_count", "variable_length_jump_table", "variable_length_field_offsets",
+                 "var_len_count", "relative_metadata_end")
+
+    def __init__(self, variable_length_field_count, variable_length_jump_table, variable_length_field_offsets,
+                 var_len_count, relative_metadata_end):
+        self.variable_length_field_count = variable_length_field_count
+        self.variable_length_jump_table = variable_length_jump_table
+        self.variable_length_field_offsets = variable_length_field_offsets
+        self.var_len_count = var_len_count
+        self.relative_metadata_end = relative_metadata_end
+
+
+def parse_relative_object_metadata_fast(record, end, variable_jump_tables_cnt=0, version=3):
+    """
+    Parse the relative records metadata that ends at offset end of the record. The metadata is read backwards from end,
+    so unlike parse_relative_object_metadata_struct the record is not reversed or copied.
+    relative_metadata_end is the length of the metadata, same as the position the struct parser ends at.
+    """
+    try:
+        if version == 3:
+            if end < 1:
+                raise IndexError("record is too short")
+            variable_length_field_count = record[end - 1]
+            metadata_len = 2 + variable_jump_tables_cnt + variable_length_field_count
+            if end < metadata_len:
+                raise IndexError("record is too short")
+            jump_table_start = end - 1 - variable_jump_tables_cnt
+            offsets_start = jump_table_start - variable_length_field_count
+            variable_length_jump_table = list(record[jump_table_start:end - 1])[::-1]
+            variable_length_field_offsets = list(record[offsets_start:jump_table_start])[::-1]
+            var_len_count = record[end - metadata_len]
+        else:
+            if end < 2:
+                raise IndexError("record is too short")
+            variable_length_field_count = RECORD_FIELD_COUNT_V4.unpack_from(record, end - 2)[0]
+            # This currently supports up to 255 columns for versions > 3
+            offsets_count = variable_length_field_count & 0xff
+            metadata_len = 4 + offsets_count * 2
+            if end < metadata_len:
+                raise IndexError("record is too short")
+            variable_length_jump_table = None
+            variable_length_field_offsets = struct.unpack_from(f"<{offsets_count}H", record,
+                                                               end - 2 - offsets_count * 2)[::-1]
+            var_len_count = RECORD_FIELD_COUNT_V4.unpack_from(record, end - metadata_len)[0]
+    except (struct.error, IndexError) as e:
+        raise StreamError(f"Failed to parse record metadata: {e}")
+    return RelativeObjectMetadata(variable_length_field_count, variable_length_jump_table,
+                                  variable_length_field_offsets, var_len_count, metadata_len)
+
+
+# Storage of MEMO/OLE values, from the flags of the memo length
+MEMO_INLINE = "inline"
+MEMO_LVAL1 = "lval1"
+MEMO_LVAL2 = "lval2"
+
+MemoHeader = namedtuple("MemoHeader", ["length", "storage", "record_pointer"])
+
+MEMO_HEADER = struct.Struct("<III")
+
+
+def parse_memo_header_fast(buffer):
+    """
+    Parse the MEMO header of a MEMO/OLE value - the length of the value without the storage flags, the storage of the
+    value (MEMO_INLINE, MEMO_LVAL1 or MEMO_LVAL2) and the record pointer of LVAL values
+    """
+    try:
+        memo_length, record_pointer, _ = MEMO_HEADER.unpack_from(buffer)
+    except struct.error as e:
+        raise StreamError(f"Failed to parse memo header: {e}")
+    if memo_length & 0x80000000:
+        storage = MEMO_INLINE
+    elif memo_length & 0x40000000:
+        storage = MEMO_LVAL1
+    else:
+        storage = MEMO_LVAL2
+    return MemoHeader(memo_length & 0x3FFFFFFF, storage, record_pointer)
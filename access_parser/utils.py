@@ -1,10 +1,17 @@
 import logging
+import mmap
+from array import array
 import os
 import struct
 import uuid
 import math
 from datetime import datetime, timedelta
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 TYPE_BOOLEAN = 1
 TYPE_INT8 = 2
 TYPE_INT16 = 3
@@ -21,9 +28,25 @@ TYPE_GUID = 15
 TYPE_96_bit_17_BYTES = 16
 TYPE_COMPLEX = 18
 
-TABLE_PAGE_MAGIC = b"\x02\x01"
 DATA_PAGE_MAGIC = b"\x01\x01"
 
+# Page types - the first byte of a page, the second one is always 0x01
+PAGE_TYPE_DB_DEF = 0x00
+PAGE_TYPE_DATA = 0x01
+PAGE_TYPE_TABLE_DEF = 0x02
+PAGE_TYPE_INDEX = 0x03
+PAGE_TYPE_LEAF_INDEX = 0x04
+PAGE_TYPE_USAGE_MAP = 0x05
+PAGE_TYPE_UNKNOWN = 0xff
+# Offset of the owner (table definition page) field in a data page header. Same in all versions
+DATA_PAGE_OWNER_OFFSET = 4
+
+# Usage map types
+USAGE_MAP_INLINE = 0x00
+USAGE_MAP_REFERENCE = 0x01
+# Usage map pages start with a 4 bytes header followed by the bitmap
+USAGE_MAP_PAGE_HEADER_LEN = 4
+
 
 ACCESS_EPOCH = datetime(1899, 12, 30)
 
@@ -135,6 +158,26 @@ def parse_money_type(parsed, prop_format):
     return money_float
 
 
+def format_money(parsed, props=None):
+    """
+    Format a money value by the Format property of its column, if it has one
+    :param parsed: the raw money value
+    :param props: extra properties of the column
+    :return: the formatted value or the raw value if there is no format
+    """
+    if props and "Format" in props:
+        prop_format = props['Format']
+        if parsed == 0:
+            parsed = [y for x, y in FORMAT_TO_DEFAULT_VALUE.items() if prop_format.startswith(x)]
+            if not parsed:
+                logging.warning(f"parse_type got unknown format while parsing money field {prop_format}")
+            else:
+                parsed = parsed[0]
+        else:
+            parsed = parse_money_type(parsed, prop_format)
+    return parsed
+
+
 def parse_type(data_type, buffer, length=None, version=3, props=None):
     parsed = ""
     # Bool or int8
@@ -145,17 +188,7 @@ def parse_type(data_type, buffer, length=None, version=3, props=None):
     elif data_type == TYPE_INT32 or data_type == TYPE_COMPLEX:
         parsed = struct.unpack_from("i", buffer)[0]
     elif data_type == TYPE_MONEY:
-        parsed = struct.unpack_from("q", buffer)[0]
-        if props and "Format" in props:
-            prop_format = props['Format']
-            if parsed == 0:
-                parsed = [y for x, y in FORMAT_TO_DEFAULT_VALUE.items() if prop_format.startswith(x)]
-                if not parsed:
-                    logging.warning(f"parse_type got unknown format while parsing money field {prop_format}")
-                else:
-                    parsed = parsed[0]
-            else:
-                parsed = parse_money_type(parsed, prop_format)
+        parsed = format_money(struct.unpack_from("q", buffer)[0], props)
     elif data_type == TYPE_FLOAT32:
         parsed = struct.unpack_from("f", buffer)[0]
     elif data_type == TYPE_FLOAT64:
@@ -193,23 +226,286 @@ def parse_type(data_type, buffer, length=None, version=3, props=None):
     return parsed
 
 
-def categorize_pages(db_data, page_size):
-    if len(db_data) % page_size:
-        logging.warning(f"DB is not full or PAGE_SIZE is wrong. page size: {page_size} DB length {len(db_data)}")
-    pages = {i: db_data[i:i + page_size] for i in range(0, len(db_data), page_size)}
-    data_pages = {}
-    table_defs = {}
-    for page in pages:
-        if pages[page].startswith(DATA_PAGE_MAGIC):
-            data_pages[page] = pages[page]
-        elif pages[page].startswith(TABLE_PAGE_MAGIC):
-            table_defs[page] = pages[page]
-    return table_defs, data_pages, pages
+class PageStore(object):
+    """
+    Page-granular, read-only access to the database file. The file is memory mapped and every page is handed out as a
+    memoryview slice of the mapping, so no page is copied until a caller explicitly asks for its bytes. This leaves the
+    caching to the OS page cache and keeps the process memory close to the size of the pages actually touched.
+    """
+    def __init__(self, db_data, page_size):
+        """
+        :param db_data: buffer holding the database file, usually the mmap returned by read_db_file
+        :param page_size: database page size
+        """
+        self.page_size = page_size
+        self._db_data = db_data
+        # Zero-copy view of the whole file
+        self.view = memoryview(db_data)
+        self.page_count = (len(self.view) + page_size - 1) // page_size
+        self._directory = None
+        self.closed = False
+
+    def __len__(self):
+        return len(self.view)
+
+    @property
+    def directory(self):
+        """
+        PageDirectory of the whole file. It is built on first use since it has to touch every page
+        """
+        if self._directory is None:
+            self._directory = categorize_pages(self)
+        return self._directory
+
+    def get_page(self, page_num):
+        """
+        Get a zero-copy view of a page
+        :param page_num: page number (page offset / page size)
+        :return: memoryview of the page or None if the page is out of the file bounds
+        """
+        self.check_open()
+        if page_num < 0 or page_num >= self.page_count:
+            return None
+        start = page_num * self.page_size
+        return self.view[start:start + self.page_size]
+
+    def page_type(self, page_num):
+        """
+        Get the type of a single page from its header
+        :param page_num: page number
+        :return: PAGE_TYPE_* code
+        """
+        page = self.get_page(page_num)
+        if page is None:
+            return PAGE_TYPE_UNKNOWN
+        return _classify_page(page)[0]
+
+    def data_page_owner(self, page_num):
+        """
+        Get the owner of a data page from its header
+        :param page_num: page number
+        :return: page number of the owner table definition or None if this is not a data page
+        """
+        page = self.get_page(page_num)
+        if page is None:
+            return None
+        page_type, owner = _classify_page(page)
+        if page_type != PAGE_TYPE_DATA:
+            return None
+        return owner
+
+    def check_open(self):
+        """
+        Fail before a view of a closed file is used, released views raise an obscure error
+        """
+        if self.closed:
+            raise ValueError("I/O operation on closed database")
+
+    def iter_pages(self):
+        """
+        Iterate all the pages in the file
+        :return: generator of (page_num, page view)
+        """
+        for page_num in range(self.page_count):
+            yield page_num, self.get_page(page_num)
+
+    def close(self):
+        """
+        Release the file mapping. Views that are still referenced elsewhere keep the mapping alive until they are
+        garbage collected.
+        """
+        self.closed = True
+        self.view.release()
+        if isinstance(self._db_data, mmap.mmap):
+            try:
+                self._db_data.close()
+            except BufferError:
+                logging.debug("Database file mapping is still in use, leaving it to be closed on garbage collection")
+
+
+class PageDirectory(object):
+    """
+    Compact directory of the database pages, indexed by page number. Holds a page type code for every page and the
+    owner (table definition page number) of every data page, instead of holding the pages themselves.
+    """
+    def __init__(self, page_types, owners):
+        """
+        :param page_types: array of PAGE_TYPE_* codes, one per page
+        :param owners: array of owner page numbers, one per page. 0 for pages that are not data pages
+        """
+        self.page_types = page_types
+        self.owners = owners
+        self._linked_pages = None
+
+    def __len__(self):
+        return len(self.page_types)
+
+    def page_type(self, page_num):
+        if page_num < 0 or page_num >= len(self.page_types):
+            return PAGE_TYPE_UNKNOWN
+        return self.page_types[page_num]
+
+    def is_table_def(self, page_num):
+        return self.page_type(page_num) == PAGE_TYPE_TABLE_DEF
+
+    def link_data_pages(self):
+        """
+        Link table definitions to their data pages. The owner of a data page is the page number of its table definition
+        :return: dict of {table definition page number: [data page numbers]}
+        """
+        if np is not None and isinstance(self.page_types, np.ndarray):
+            return self._link_data_pages_numpy()
+        tables_pages = {}
+        for page_num, page_type in enumerate(self.page_types):
+            if page_type != PAGE_TYPE_DATA:
+                continue
+            owner = self.owners[page_num]
+            if self.is_table_def(owner):
+                tables_pages.setdefault(owner, []).append(page_num)
+        return tables_pages
+
+    def pages_owned_by(self, table_page):
+        """
+        Get the data pages of a single table by their owner. The owners of all data pages are linked on the first call
+        :param table_page: page number of the table definition
+        :return: list of data page numbers
+        """
+        if self._linked_pages is None:
+            self._linked_pages = self.link_data_pages()
+        return self._linked_pages.get(table_page, [])
+
+    def _link_data_pages_numpy(self):
+        data_pages = np.flatnonzero(self.page_types == PAGE_TYPE_DATA)
+        owners = self.owners[data_pages]
+        # Keep only data pages owned by a table definition page
+        owned = owners < len(self.page_types)
+        data_pages, owners = data_pages[owned], owners[owned]
+        owned = self.page_types[owners] == PAGE_TYPE_TABLE_DEF
+        data_pages, owners = data_pages[owned], owners[owned]
+        # Group by owner, a stable sort keeps the data pages of each table in file order
+        order = np.argsort(owners, kind="stable")
+        data_pages, owners = data_pages[order], owners[order]
+        table_pages, group_starts = np.unique(owners, return_index=True)
+        return {table_page: linked_pages.tolist() for table_page, linked_pages in
+                zip(table_pages.tolist(), np.split(data_pages, group_starts[1:]))}
+
+
+def _classify_page(page):
+    """
+    Get the type and owner of a single page
+    :param page: page data
+    :return: (PAGE_TYPE_*, owner page number or 0 if this is not a data page)
+    """
+    if len(page) < 2 or page[1] != 0x01:
+        return PAGE_TYPE_UNKNOWN, 0
+    if page[0] != PAGE_TYPE_DATA:
+        return page[0], 0
+    if len(page) < DATA_PAGE_OWNER_OFFSET + 4:
+        logging.error(f"Failed to parse data page {bytes(page)}")
+        return PAGE_TYPE_UNKNOWN, 0
+    return PAGE_TYPE_DATA, struct.unpack_from("<I", page, DATA_PAGE_OWNER_OFFSET)[0]
+
+
+def _categorize_pages_numpy(pages):
+    """
+    Build the page directory with a couple of strided reads over the whole file instead of a loop over the pages
+    """
+    page_size = pages.page_size
+    full_pages = len(pages) // page_size
+    page_bytes = np.frombuffer(pages.view, dtype=np.uint8, count=full_pages * page_size).reshape(full_pages,
+                                                                                                 page_size)
+    page_types = np.full(pages.page_count, PAGE_TYPE_UNKNOWN, dtype=np.uint8)
+    page_types[:full_pages] = np.where(page_bytes[:, 1] == 0x01, page_bytes[:, 0], PAGE_TYPE_UNKNOWN)
+    owners = np.zeros(pages.page_count, dtype=np.uint32)
+    owners[:full_pages] = np.ndarray((full_pages,), dtype="<u4", buffer=pages.view, offset=DATA_PAGE_OWNER_OFFSET,
+                                     strides=(page_size,))
+    owners[page_types != PAGE_TYPE_DATA] = 0
+    # Trailing partial page
+    if full_pages != pages.page_count:
+        page_types[full_pages], owners[full_pages] = _classify_page(pages.get_page(full_pages))
+    return PageDirectory(page_types, owners)
+
+
+def categorize_pages(pages):
+    """
+    Build the page directory of the database. Uses numpy when it is available
+    :param pages: PageStore of the database
+    :return: PageDirectory
+    """
+    if len(pages) % pages.page_size:
+        logging.warning(f"DB is not full or PAGE_SIZE is wrong. page size: {pages.page_size} DB length {len(pages)}")
+    if np is not None:
+        return _categorize_pages_numpy(pages)
+    page_types = array("B", bytes([PAGE_TYPE_UNKNOWN])) * pages.page_count
+    owners = array("I", [0]) * pages.page_count
+    for page_num, page in pages.iter_pages():
+        page_types[page_num], owners[page_num] = _classify_page(page)
+    return PageDirectory(page_types, owners)
+
+
+def _bitmap_to_pages(bitmap, first_page):
+    """
+    Get the page numbers of all the set bits in a usage map bitmap
+    :param bitmap: bitmap data, bit i is page first_page + i
+    :param first_page: page number of the first bit
+    :return: list of page numbers
+    """
+    if np is not None:
+        bits = np.unpackbits(np.frombuffer(bitmap, dtype=np.uint8), bitorder="little")
+        return (np.flatnonzero(bits) + first_page).tolist()
+    page_nums = []
+    for byte_index, byte in enumerate(bitmap):
+        if not byte:
+            continue
+        for bit in range(8):
+            if byte & (1 << bit):
+                page_nums.append(first_page + byte_index * 8 + bit)
+    return page_nums
+
+
+def decode_usage_map(usage_map, pages):
+    """
+    Decode a usage map record to the list of pages it marks. Inline maps (type 0) hold a start page and a bitmap.
+    Reference maps (type 1) hold a list of usage map pages, each one is a bitmap of (page size - 4) * 8 pages.
+    :param usage_map: usage map record
+    :param pages: PageStore, used to read the bitmap pages of reference maps
+    :return: sorted list of page numbers or None if the map could not be decoded
+    """
+    if not usage_map:
+        return None
+    map_type = usage_map[0]
+    if map_type == USAGE_MAP_INLINE:
+        if len(usage_map) < 5:
+            return None
+        first_page = struct.unpack_from("<I", usage_map, 1)[0]
+        return _bitmap_to_pages(usage_map[5:], first_page)
+    if map_type == USAGE_MAP_REFERENCE:
+        pages_per_map_page = (pages.page_size - USAGE_MAP_PAGE_HEADER_LEN) * 8
+        page_nums = []
+        for map_index in range((len(usage_map) - 1) // 4):
+            map_page_num = struct.unpack_from("<I", usage_map, 1 + map_index * 4)[0]
+            if not map_page_num:
+                continue
+            map_page = pages.get_page(map_page_num)
+            if map_page is None or map_page[0] != PAGE_TYPE_USAGE_MAP:
+                logging.warning(f"Usage map page {map_page_num} is not a valid usage map page")
+                return None
+            page_nums.extend(_bitmap_to_pages(map_page[USAGE_MAP_PAGE_HEADER_LEN:], map_index * pages_per_map_page))
+        return page_nums
+    logging.warning(f"Unknown usage map type {map_type}")
+    return None
 
 
 def read_db_file(path):
+    """
+    Memory map the database file for reading
+    :param path: path to the database file
+    :return: read-only mmap of the file (empty bytes for an empty file, which can't be mapped)
+    """
     if not os.path.isfile(path):
         logging.error(f"File {path} not found")
         raise FileNotFoundError(f"File {path} not found")
     with open(path, "rb") as f:
-        return f.read()
+        if not os.fstat(f.fileno()).st_size:
+            return b""
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
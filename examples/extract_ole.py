@@ -0,0 +1,17 @@
+from access_parser import AccessParser
+import argparse
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Extract the OLE objects of a DB to a content addressed directory")
+    parser.add_argument("-f", "--file", required=True, help="*.mdb / *.accdb File")
+    parser.add_argument("-o", "--output", required=True, help="Output directory")
+    parser.add_argument("-t", "--tables", required=False, help="Comma separated tables to extract", default=None)
+    parser.add_argument("-a", "--algorithm", required=False, help="Content hash algorithm", default="sha256")
+    parser.add_argument("-w", "--workers", required=False, help="Number of extraction threads", type=int, default=8)
+
+    args = parser.parse_args()
+    tables = args.tables.split(",") if args.tables else None
+    with AccessParser(args.file, lazy=True) as db:
+        result = db.extract_blobs(args.output, tables=tables, algorithm=args.algorithm, workers=args.workers)
+    print(f"Extracted {result['blobs']} OLE objects, {result['stored']} new files written to {args.output}")
@@ -3,13 +3,13 @@ from tabulate import tabulate
 import argparse
 
 
-def print_tables(db_path, only_catalog=False, specific_table=None):
+def print_tables(db_path, only_catalog=False, specific_table=None, columns=None, limit=None):
     db = AccessParser(db_path)
     if only_catalog:
         for k in db.catalog.keys():
             print(f"{k}\n")
     elif specific_table:
-        table = db.parse_table(specific_table)
+        table = db.parse_table(specific_table, columns=columns, limit=limit)
         print(f'TABLE NAME: {specific_table}\r\n')
         print(tabulate(table, headers="keys", disable_numparse=True))
         print("\n\n\n\n")
@@ -22,6 +22,11 @@ if __name__ == '__main__':
     parser.add_argument("-c", "--catalog", required=False, help="Print DB table names", action="store_true")
     parser.add_argument("-f", "--file", required=True, help="*.mdb / *.accdb File")
     parser.add_argument("-t", "--table", required=False, help="Table to print", default=None)
+    parser.add_argument("--columns", required=False, help="Comma separated columns to print from the table",
+                        default=None)
+    parser.add_argument("-n", "--limit", required=False, help="Number of rows to print from the table", type=int,
+                        default=None)
 
     args = parser.parse_args()
-    print_tables(args.file, args.catalog, args.table)
+    columns = args.columns.split(",") if args.columns else None
+    print_tables(args.file, args.catalog, args.table, columns, args.limit)
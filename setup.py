@@ -23,4 +23,7 @@ setuptools.setup(
           'construct',
           'tabulate',
       ],
+    extras_require={
+          'numpy': ['numpy>=1.17'],
+      },
 )
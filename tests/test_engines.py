@@ -0,0 +1,81 @@
+import random
+import struct
+
+import pytest
+from construct import ConstructError
+
+from access_parser.parsing_primitives import parse_data_page_header, parse_data_page_header_fast, \
+    parse_relative_object_metadata_struct, parse_relative_object_metadata_fast
+
+# Randomized differential checks of the fast (struct based) engine against the construct reference engine
+SEED = 1234
+ITERATIONS = 2000
+
+
+def parse_both(fast_parse, reference_parse):
+    """
+    :return: (fast result, reference result), None for an engine that raised a construct error
+    """
+    results = []
+    for parse in (fast_parse, reference_parse):
+        try:
+            results.append(parse())
+        except ConstructError:
+            results.append(None)
+    return results
+
+
+@pytest.mark.parametrize("version", [3, 4])
+def test_data_page_header(version):
+    rnd = random.Random(SEED + version)
+    for _ in range(ITERATIONS):
+        record_count = rnd.randrange(0, 40)
+        header = struct.pack("<2sHI", b"\x01\x01", rnd.randrange(0x10000), rnd.randrange(0x100000000))
+        if version > 3:
+            header += struct.pack("<I", rnd.randrange(0x100000000))
+        header += struct.pack("<H", record_count)
+        header += struct.pack(f"<{record_count}H", *(rnd.randrange(0x10000) for _ in range(record_count)))
+        # Truncated pages and bad magic have to fail in both engines
+        page = header[:rnd.randrange(len(header) + 1)] if rnd.random() < 0.2 else header + b"\x00" * 16
+        if rnd.random() < 0.05:
+            page = b"\x02" + page[1:]
+        fast, reference = parse_both(lambda: parse_data_page_header_fast(page, version=version),
+                                     lambda: parse_data_page_header(page, version=version))
+        if reference is None:
+            assert fast is None
+            continue
+        assert fast is not None
+        assert fast.data_free_space == reference.data_free_space
+        assert fast.owner == reference.owner
+        assert fast.ver4_unknown_dat1 == reference.ver4_unknown_dat1
+        assert fast.record_count == reference.record_count
+        assert list(fast.record_offsets) == list(reference.record_offsets)
+
+
+@pytest.mark.parametrize("version", [3, 4])
+def test_relative_object_metadata(version):
+    rnd = random.Random(SEED * 10 + version)
+    for _ in range(ITERATIONS):
+        record = bytearray(rnd.randrange(0x100) for _ in range(rnd.randrange(0, 80)))
+        end = rnd.randrange(0, len(record) + 1)
+        # Plant a field count that fits in the record most of the time, random counts mostly overflow it
+        if rnd.random() < 0.7:
+            if version == 3 and end >= 1:
+                record[end - 1] = rnd.randrange(0, end)
+            elif version > 3 and end >= 2:
+                record[end - 2:end] = struct.pack("<H", rnd.randrange(0, end // 2 + 1) | rnd.choice([0, 0x100]))
+        record = bytes(record)
+        jump_tables = rnd.randrange(0, 3) if version == 3 else 0
+        fast, reference = parse_both(
+            lambda: parse_relative_object_metadata_fast(record, end, jump_tables, version=version),
+            lambda: parse_relative_object_metadata_struct(record[:end][::-1], jump_tables, version=version))
+        if reference is None:
+            assert fast is None
+            continue
+        assert fast is not None
+        assert fast.variable_length_field_count == reference.variable_length_field_count
+        if version == 3:
+            assert list(fast.variable_length_jump_table) == list(reference.variable_length_jump_table)
+        assert list(fast.variable_length_field_offsets) == list(reference.variable_length_field_offsets)
+        assert fast.var_len_count == reference.var_len_count
+        assert fast.relative_metadata_end == reference.relative_metadata_end
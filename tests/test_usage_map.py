@@ -0,0 +1,64 @@
+import struct
+
+import pytest
+
+from access_parser import utils
+from access_parser.utils import PageStore, decode_usage_map, USAGE_MAP_INLINE, USAGE_MAP_REFERENCE, \
+    PAGE_TYPE_USAGE_MAP, USAGE_MAP_PAGE_HEADER_LEN
+
+PAGE_SIZE = 0x800
+PAGES_PER_MAP_PAGE = (PAGE_SIZE - USAGE_MAP_PAGE_HEADER_LEN) * 8
+
+
+def build_pages(pages):
+    """
+    :param pages: dict of {page number: page data}, pages are padded to PAGE_SIZE
+    :return: PageStore over the pages, missing pages are zeros
+    """
+    db_data = bytearray(PAGE_SIZE * (max(pages) + 1))
+    for page_num, data in pages.items():
+        db_data[page_num * PAGE_SIZE:page_num * PAGE_SIZE + len(data)] = data
+    return PageStore(bytes(db_data), PAGE_SIZE)
+
+
+def usage_map_page(set_bits):
+    bitmap = bytearray(PAGE_SIZE - USAGE_MAP_PAGE_HEADER_LEN)
+    for bit in set_bits:
+        bitmap[bit // 8] |= 1 << (bit % 8)
+    return bytes([PAGE_TYPE_USAGE_MAP, 0x01, 0, 0]) + bytes(bitmap)
+
+
+@pytest.fixture(params=[True, False], ids=["numpy", "python"])
+def bitmap_engine(request, monkeypatch):
+    if request.param and utils.np is None:
+        pytest.skip("numpy is not installed")
+    if not request.param:
+        monkeypatch.setattr(utils, "np", None)
+
+
+def test_inline_usage_map(bitmap_engine):
+    usage_map = struct.pack("<BI", USAGE_MAP_INLINE, 100) + bytes([0b00000101, 0, 0b10000000])
+    assert decode_usage_map(usage_map, build_pages({0: b""})) == [100, 102, 123]
+
+
+def test_reference_usage_map(bitmap_engine):
+    # The second map page covers the pages after the ones of the first map page, a 0 pointer is a map page that is
+    # not allocated
+    pages = build_pages({3: usage_map_page([5, 9]), 4: usage_map_page([0, 17])})
+    usage_map = struct.pack("<B3I", USAGE_MAP_REFERENCE, 3, 0, 4)
+    assert decode_usage_map(usage_map, pages) == [5, 9, 2 * PAGES_PER_MAP_PAGE, 2 * PAGES_PER_MAP_PAGE + 17]
+
+
+def test_reference_usage_map_invalid_page(bitmap_engine):
+    # Page 3 is not a usage map page
+    pages = build_pages({3: bytes([0x01, 0x01]), 4: usage_map_page([1])})
+    assert decode_usage_map(struct.pack("<B2I", USAGE_MAP_REFERENCE, 4, 3), pages) is None
+    # Page 9 is out of the file
+    assert decode_usage_map(struct.pack("<BI", USAGE_MAP_REFERENCE, 9), pages) is None
+
+
+def test_invalid_usage_map():
+    pages = build_pages({0: b""})
+    assert decode_usage_map(b"", pages) is None
+    assert decode_usage_map(bytes([USAGE_MAP_INLINE, 1]), pages) is None
+    assert decode_usage_map(bytes([7, 0, 0, 0, 0]), pages) is None